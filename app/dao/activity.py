@@ -1,15 +1,48 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
-from typing import Optional, Sequence, List
+from sqlalchemy import select, insert, delete, func, Select
+from typing import Optional, Sequence, List, Tuple, Union
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from app.models.activity import Activity
+from app.models.activity import Activity, activity_closure
+from app.utils.activity_tree import activity_tree
+from app.utils.documents import attach_collection, nested_columns, row_document
+from app.utils.name_trie import activity_trie
+from app.utils.pagination import keyset_page
+from app.utils.search import name_search
+
+# Столбцы документа вида деятельности, его родителя и детей
+ACTIVITY_COLUMNS = (Activity.id, Activity.name, Activity.parent_id)
 
 
 class ActivityDAO:
     @classmethod
-    async def get_by_id(cls, db: AsyncSession, activity_id: int) -> Optional[Activity]:
+    def select_documents(cls) -> Select:
+        """Core-запрос документов видов деятельности с родителем первого уровня, без ORM-объектов"""
+        parent = aliased(Activity)
+        return (
+            select(*ACTIVITY_COLUMNS, *nested_columns('parent', [parent.id, parent.name, parent.parent_id]))
+            .select_from(Activity)
+            .outerjoin(parent, parent.id == Activity.parent_id)
+        )
+
+    @classmethod
+    async def fetch_documents(cls, db: AsyncSession, query: Select) -> List[dict]:
+        """Выполнить запрос из select_documents и дочитать детей первого уровня одним запросом"""
+        result = await db.execute(query)
+        documents = [row_document(row) for row in result.mappings()]
+        children = select(*ACTIVITY_COLUMNS).order_by(Activity.id)
+        await attach_collection(db, documents, 'children', children, Activity.parent_id)
+        return documents
+
+    @classmethod
+    async def get_by_id(cls, db: AsyncSession, activity_id: int) -> Optional[dict]:
+        documents = await cls.fetch_documents(db, cls.select_documents().where(Activity.id == activity_id))
+        return documents[0] if documents else None
+
+    @classmethod
+    async def _get_entity(cls, db: AsyncSession, activity_id: int) -> Optional[Activity]:
+        """ORM-объект вида деятельности с детьми и родителем для изменения и удаления"""
         query = (
             select(Activity)
             .options(selectinload(Activity.children), selectinload(Activity.parent))
@@ -19,72 +52,122 @@ class ActivityDAO:
         return result.scalar_one_or_none()
 
     @classmethod
-    async def get_by_name(cls, db: AsyncSession, name: str) -> Optional[Activity]:
+    async def get_by_name(
+        cls,
+        db: AsyncSession,
+        name: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+    ) -> List[dict]:
+        query = name_search(cls.select_documents(), Activity.name, name, rank)
+        return await cls.fetch_documents(db, keyset_page(query, Activity.id, limit, after_id))
+
+    @classmethod
+    async def autocomplete(cls, db: AsyncSession, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        if activity_trie.loaded:
+            return activity_trie.complete(prefix, limit)
+
         query = (
-            select(Activity)
-            .options(selectinload(Activity.children), selectinload(Activity.parent))
-            .where(Activity.name.ilike(f'%{name}%'))
+            select(Activity.id, Activity.name)
+            .where(Activity.name.ilike(f'{prefix}%'))
+            .order_by(func.lower(Activity.name), Activity.id)
+            .limit(limit)
         )
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return [tuple(row) for row in result]
 
     @classmethod
-    async def get_all(cls, db: AsyncSession) -> Sequence[Activity]:
-        query = select(Activity).options(selectinload(Activity.children), selectinload(Activity.parent))
+    async def get_all(cls, db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[dict]:
+        return await cls.fetch_documents(db, keyset_page(cls.select_documents(), Activity.id, limit, after_id))
+
+    @classmethod
+    async def get_flat_tree(cls, db: AsyncSession) -> Sequence[Tuple[int, str, Optional[int]]]:
+        """Получить все виды деятельности плоским списком (id, name, parent_id)"""
+        if activity_tree.loaded:
+            return activity_tree.rows()
+
+        query = select(Activity.id, Activity.name, Activity.parent_id).order_by(Activity.id)
         result = await db.execute(query)
-        return result.scalars().all()
+        return [tuple(row) for row in result]
 
     @classmethod
-    async def get_root_activities(cls, db: AsyncSession) -> Sequence[Activity]:
+    async def get_root_activities(cls, db: AsyncSession) -> List[dict]:
         """Получить корневые виды деятельности (без родителя)"""
-        query = select(Activity).options(selectinload(Activity.children)).where(Activity.parent_id.is_(None))
-        result = await db.execute(query)
-        return result.scalars().all()
+        if activity_tree.loaded:
+            return [activity_tree.node(activity_id) for activity_id in activity_tree.root_ids()]
+
+        query = cls.select_documents().where(Activity.parent_id.is_(None)).order_by(Activity.id)
+        return await cls.fetch_documents(db, query)
 
     @classmethod
-    async def get_children(cls, db: AsyncSession, parent_id: int, max_depth: int = 3) -> Sequence[Activity]:
-        """Получить дочерние виды деятельности с ограничением глубины"""
-        from sqlalchemy.orm import aliased
+    async def get_children(cls, db: AsyncSession, parent_id: int, max_depth: Optional[int] = None) -> List[dict]:
+        """Получить дочерние виды деятельности (все уровни, либо не глубже max_depth)"""
+        if activity_tree.loaded:
+            descendant_ids = activity_tree.descendant_ids(parent_id, max_depth)
+            return [activity_tree.node(activity_id) for activity_id in descendant_ids]
 
-        Activity1 = aliased(Activity)
-        Activity2 = aliased(Activity)
-        Activity3 = aliased(Activity)
+        query = (
+            cls.select_documents()
+            .join(activity_closure, Activity.id == activity_closure.c.descendant_id)
+            .where(activity_closure.c.ancestor_id == parent_id, activity_closure.c.depth > 0)
+            .order_by(activity_closure.c.depth, Activity.id)
+        )
+        if max_depth is not None:
+            query = query.where(activity_closure.c.depth <= max_depth)
 
-        if max_depth == 1:
-            query = select(Activity).where(Activity.parent_id == parent_id)
-        elif max_depth == 2:
-            query = select(Activity).where(
-                or_(
-                    Activity.parent_id == parent_id,
-                    Activity.parent_id.in_(select(Activity1.id).where(Activity1.parent_id == parent_id)),
-                )
-            )
-        else:  # max_depth == 3
-            query = select(Activity).where(
-                or_(
-                    Activity.parent_id == parent_id,
-                    Activity.parent_id.in_(select(Activity1.id).where(Activity1.parent_id == parent_id)),
-                    Activity.parent_id.in_(
-                        select(Activity2.id).where(
-                            Activity2.parent_id.in_(select(Activity3.id).where(Activity3.parent_id == parent_id))
-                        )
-                    ),
-                )
-            )
+        return await cls.fetch_documents(db, query)
 
-        result = await db.execute(query)
-        return result.scalars().all()
+    @classmethod
+    async def get_ancestors(cls, db: AsyncSession, activity_id: int) -> List[dict]:
+        """Получить всех предков вида деятельности, начиная с корня"""
+        if activity_tree.loaded:
+            return [activity_tree.node(ancestor_id) for ancestor_id in activity_tree.ancestor_ids(activity_id)]
+
+        query = (
+            cls.select_documents()
+            .join(activity_closure, Activity.id == activity_closure.c.ancestor_id)
+            .where(activity_closure.c.descendant_id == activity_id, activity_closure.c.depth > 0)
+            .order_by(activity_closure.c.depth.desc())
+        )
+        return await cls.fetch_documents(db, query)
 
     @classmethod
-    async def get_all_children_ids(cls, db: AsyncSession, activity_id: int, max_depth: int = 3) -> List[int]:
-        activities = await cls.get_children(db, activity_id, max_depth)
-        return [activity.id for activity in activities] + [activity_id]
+    def descendant_ids_query(cls, activity_id: int, max_depth: Optional[int] = None):
+        """Подзапрос с ID вида деятельности и всех его потомков"""
+        query = select(activity_closure.c.descendant_id).where(activity_closure.c.ancestor_id == activity_id)
+        if max_depth is not None:
+            query = query.where(activity_closure.c.depth <= max_depth)
+        return query
+
+    @classmethod
+    def subtree_ids_filter(cls, activity_id: int) -> Union[List[int], Select]:
+        """Значение для `column.in_()`: ID поддерева из индекса в памяти, либо подзапрос по таблице замыкания"""
+        if activity_tree.loaded:
+            return list(activity_tree.subtree_ids(activity_id))
+        return cls.descendant_ids_query(activity_id)
+
+    @classmethod
+    async def get_all_children_ids(
+        cls, db: AsyncSession, activity_id: int, max_depth: Optional[int] = None
+    ) -> List[int]:
+        if activity_tree.loaded:
+            return [activity_id, *activity_tree.descendant_ids(activity_id, max_depth)]
+
+        result = await db.execute(cls.descendant_ids_query(activity_id, max_depth))
+        return list(result.scalars().all())
 
     @classmethod
     async def create(cls, db: AsyncSession, activity_data: dict) -> Activity:
         activity = Activity(**activity_data)
         db.add(activity)
+        await db.flush()
+
+        await db.execute(insert(activity_closure).values(ancestor_id=activity.id, descendant_id=activity.id, depth=0))
+        await cls._attach_subtree(db, activity.id, activity.parent_id)
         await db.commit()
+        activity_tree.add(activity.id, activity.name, activity.parent_id)
+        activity_trie.add(activity.id, activity.name)
 
         query = (
             select(Activity)
@@ -97,24 +180,68 @@ class ActivityDAO:
 
     @classmethod
     async def update(cls, db: AsyncSession, activity_id: int, update_data: dict) -> Optional[Activity]:
-        activity = await cls.get_by_id(db, activity_id)
+        activity = await cls._get_entity(db, activity_id)
         if activity is None:
             return None
 
+        parent_changed = 'parent_id' in update_data and update_data['parent_id'] != activity.parent_id
+        if parent_changed and update_data['parent_id'] is not None:
+            subtree_ids = await cls.get_all_children_ids(db, activity_id)
+            if update_data['parent_id'] in subtree_ids:
+                raise ValueError(f'Activity {activity_id} cannot be moved under its own descendant')
+
         for key, value in update_data.items():
             if hasattr(activity, key):
                 setattr(activity, key, value)
 
+        if parent_changed:
+            await cls._detach_subtree(db, activity_id)
+            await cls._attach_subtree(db, activity_id, activity.parent_id)
+
         await db.commit()
+        activity_tree.update(activity_id, activity.name, activity.parent_id)
+        activity_trie.update(activity_id, activity.name)
         await db.refresh(activity)
         return activity
 
     @classmethod
     async def delete(cls, db: AsyncSession, activity_id: int) -> bool:
-        activity = await cls.get_by_id(db, activity_id)
+        activity = await cls._get_entity(db, activity_id)
         if activity is None:
             return False
 
+        subtree = cls.descendant_ids_query(activity_id)
+        subtree_ids = (await db.execute(subtree)).scalars().all()
+        await db.execute(delete(activity_closure).where(activity_closure.c.descendant_id.in_(subtree)))
         await db.delete(activity)
         await db.commit()
+        activity_tree.remove(activity_id)
+        for descendant_id in subtree_ids:
+            activity_trie.remove(descendant_id)
         return True
+
+    @classmethod
+    async def _detach_subtree(cls, db: AsyncSession, activity_id: int) -> None:
+        """Удалить связи поддерева activity_id со всеми его внешними предками"""
+        subtree = cls.descendant_ids_query(activity_id)
+        await db.execute(
+            delete(activity_closure).where(
+                activity_closure.c.descendant_id.in_(subtree),
+                activity_closure.c.ancestor_id.not_in(subtree),
+            )
+        )
+
+    @classmethod
+    async def _attach_subtree(cls, db: AsyncSession, activity_id: int, parent_id: Optional[int]) -> None:
+        """Связать поддерево activity_id со всеми предками parent_id (включая его самого)"""
+        if parent_id is None:
+            return
+
+        above = activity_closure.alias('above')
+        below = activity_closure.alias('below')
+        query = (
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above.join(below, below.c.ancestor_id == activity_id))
+            .where(above.c.descendant_id == parent_id)
+        )
+        await db.execute(insert(activity_closure).from_select(['ancestor_id', 'descendant_id', 'depth'], query))
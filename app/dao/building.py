@@ -1,101 +1,299 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from typing import Optional, Sequence
+from sqlalchemy import select, and_, or_, func, any_, bindparam, column, ARRAY, BigInteger, Float, Integer
+from typing import Optional, List
 import math
 
+import numpy as np
+
 from app.models.building import Building
+from app.models.organization import Organization
+from app.utils.building_index import building_index
+from app.utils.documents import row_document
+from app.utils.fieldsets import FieldSet
+from app.utils.name_index import organization_name_index
+from app.utils.name_trie import organization_trie
+from app.utils.pagination import keyset_page
+from app.utils.geo import encode_cell, cell_ranges, radius_bboxes, haversine_km_many, EARTH_RADIUS_KM
+from app.utils.search import name_search
+
+# Столбцы документа здания для чтения (без служебного geo_cell)
+BUILDING_COLUMNS = (Building.id, Building.address, Building.latitude, Building.longitude)
+
+# Метка номера области в строках пакетного геопоиска
+BATCH_INDEX_KEY = 'batch_idx'
+
+# Столбцы табличного выражения пакетного геопоиска (BuildingDAO.batch_areas)
+BATCH_AREA_COLUMNS = (
+    ('idx', Integer),
+    ('cell_start', BigInteger),
+    ('cell_end', BigInteger),
+    ('min_lat', Float),
+    ('max_lat', Float),
+    ('min_lng', Float),
+    ('max_lng', Float),
+    ('lat_rad', Float),
+    ('lng_rad', Float),
+    ('cos_lat', Float),
+    ('radius_km', Float),
+)
 
 
 class BuildingDAO:
     @classmethod
-    async def get_by_id(cls, db: AsyncSession, building_id: int) -> Optional[Building]:
-        query = select(Building).where(Building.id == building_id)
-        result = await db.execute(query)
-        return result.scalar_one_or_none()
+    def document_columns(cls, fields: Optional[FieldSet] = None) -> list:
+        """Столбцы здания для Core-запросов: все поля документа, либо только запрошенные в fields (и id)"""
+        if fields is None:
+            return list(BUILDING_COLUMNS)
+        return [Building.id, *(getattr(Building, name) for name in fields if name != 'id')]
 
     @classmethod
-    async def get_by_address(cls, db: AsyncSession, address: str) -> Optional[Building]:
-        query = select(Building).where(Building.address.ilike(f'%{address}%'))
+    async def fetch_documents(cls, db: AsyncSession, query) -> List[dict]:
+        """Выполнить Core-запрос и вернуть строки словарями, без ORM-объектов"""
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return [row_document(row) for row in result.mappings()]
 
     @classmethod
-    async def get_all(cls, db: AsyncSession) -> Sequence[Building]:
-        query = select(Building)
-        result = await db.execute(query)
-        return result.scalars().all()
+    async def get_by_id(cls, db: AsyncSession, building_id: int, fields: Optional[FieldSet] = None) -> Optional[dict]:
+        query = select(*cls.document_columns(fields)).where(Building.id == building_id)
+        documents = await cls.fetch_documents(db, query)
+        return documents[0] if documents else None
 
     @classmethod
-    async def get_in_radius(cls, db: AsyncSession, lat: float, lng: float, radius_km: float) -> Sequence[Building]:
-        lat_diff = radius_km / 111.0
-        lng_diff = radius_km / (111.0 * abs(math.cos(math.radians(lat))))
+    async def get_by_address(
+        cls,
+        db: AsyncSession,
+        address: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        query = name_search(select(*cls.document_columns(fields)), Building.address, address, rank)
+        return await cls.fetch_documents(db, keyset_page(query, Building.id, limit, after_id))
 
-        query = select(Building).where(
-            and_(
-                Building.latitude.between(lat - lat_diff, lat + lat_diff),
-                Building.longitude.between(lng - lng_diff, lng + lng_diff),
-            )
-        )
-        result = await db.execute(query)
-        buildings = result.scalars().all()
+    @classmethod
+    async def get_all(
+        cls,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        query = select(*cls.document_columns(fields))
+        return await cls.fetch_documents(db, keyset_page(query, Building.id, limit, after_id))
+
+    @classmethod
+    async def get_in_radius(
+        cls, db: AsyncSession, lat: float, lng: float, radius_km: float, fields: Optional[FieldSet] = None
+    ) -> List[dict]:
+        if building_index.loaded:
+            return building_index.in_radius(lat, lng, radius_km)
+
+        building_ids = await cls.get_ids_in_radius(db, lat, lng, radius_km)
+        if not building_ids:
+            return []
 
-        return [b for b in buildings if cls._calculate_distance(lat, lng, b.latitude, b.longitude) <= radius_km]
+        query = select(*cls.document_columns(fields)).where(cls.ids_filter(building_ids))
+        return await cls.fetch_documents(db, query)
 
     @classmethod
     async def get_in_rectangle(
-        cls, db: AsyncSession, min_lat: float, max_lat: float, min_lng: float, max_lng: float
-    ) -> Sequence[Building]:
-        query = select(Building).where(
-            and_(Building.latitude.between(min_lat, max_lat), Building.longitude.between(min_lng, max_lng))
+        cls,
+        db: AsyncSession,
+        min_lat: float,
+        max_lat: float,
+        min_lng: float,
+        max_lng: float,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        if building_index.loaded:
+            return building_index.in_rectangle(min_lat, max_lat, min_lng, max_lng)
+
+        query = select(*cls.document_columns(fields)).where(cls.bbox_filter(min_lat, max_lat, min_lng, max_lng))
+        return await cls.fetch_documents(db, query)
+
+    @classmethod
+    async def get_ids_in_radius(cls, db: AsyncSession, lat: float, lng: float, radius_km: float) -> List[int]:
+        if building_index.loaded:
+            return [b['id'] for b in building_index.in_radius(lat, lng, radius_km)]
+
+        query = select(Building.id, Building.latitude, Building.longitude).where(
+            cls.radius_bbox_filter(lat, lng, radius_km)
         )
         result = await db.execute(query)
-        return result.scalars().all()
+        rows = result.all()
+        if not rows:
+            return []
+
+        ids, lats, lngs = (np.array(column) for column in zip(*rows))
+        return ids[haversine_km_many(lat, lng, lats, lngs) <= radius_km].tolist()
+
+    @classmethod
+    def radius_filter(cls, lat: float, lng: float, radius_km: float):
+        """Условие попадания здания в круг для использования внутри других запросов"""
+        if building_index.loaded:
+            return cls.ids_filter([b['id'] for b in building_index.in_radius(lat, lng, radius_km)])
+
+        return and_(
+            cls.radius_bbox_filter(lat, lng, radius_km),
+            cls.distance_km_expr(lat, lng) <= radius_km,
+        )
+
+    @classmethod
+    def rectangle_filter(cls, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        """Условие попадания здания в прямоугольник для использования внутри других запросов"""
+        if building_index.loaded:
+            return cls.ids_filter([b['id'] for b in building_index.in_rectangle(min_lat, max_lat, min_lng, max_lng)])
+
+        return cls.bbox_filter(min_lat, max_lat, min_lng, max_lng)
+
+    @classmethod
+    def ids_filter(cls, building_ids: List[int]):
+        """Условие id = ANY(:ids): весь список - один параметр-массив, а не параметр на каждый id"""
+        return Building.id == any_(bindparam(None, building_ids, type_=ARRAY(Integer)))
+
+    @classmethod
+    def distance_km_expr(cls, lat: float, lng: float):
+        """SQL-выражение расстояния (haversine, км) от точки до здания"""
+        lat_rad = math.radians(lat)
+        return cls._haversine_expr(lat_rad, math.radians(lng), math.cos(lat_rad))
+
+    @classmethod
+    def _haversine_expr(cls, lat_rad, lng_rad, cos_lat):
+        """Расстояние до здания; параметры точки могут быть числами или столбцами запроса"""
+        building_lat = func.radians(Building.latitude, type_=Float)
+        dlat = building_lat - lat_rad
+        dlon = func.radians(Building.longitude, type_=Float) - lng_rad
+
+        a = func.power(func.sin(dlat * 0.5), 2) + cos_lat * func.cos(building_lat) * func.power(func.sin(dlon * 0.5), 2)
+        return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+    @classmethod
+    def batch_areas(cls, geo_queries: List[dict]):
+        """
+        Табличное выражение с областями пакетного геопоиска: unnest параллельных массивов.
+
+        На каждую область приходится по строке на диапазон ячеек geo_cell, поэтому
+        соединение со зданиями идёт по индексу; число параметров не зависит от размера пакета.
+        """
+        columns = {name: [] for name, _ in BATCH_AREA_COLUMNS}
+        for idx, geo_query in enumerate(geo_queries):
+            if geo_query['radius_km']:
+                lat_rad = math.radians(geo_query['latitude'])
+                boxes = radius_bboxes(geo_query['latitude'], geo_query['longitude'], geo_query['radius_km'])
+                center = (lat_rad, math.radians(geo_query['longitude']), math.cos(lat_rad), geo_query['radius_km'])
+            else:
+                boxes = [(geo_query['min_lat'], geo_query['max_lat'], geo_query['min_lng'], geo_query['max_lng'])]
+                center = (0.0, 0.0, 0.0, None)
+
+            for bounds in boxes:
+                for start, end in cell_ranges(*bounds):
+                    row = (idx, start, end - 1, *bounds, *center)
+                    for (name, _), value in zip(BATCH_AREA_COLUMNS, row):
+                        columns[name].append(value)
+
+        arrays = [bindparam(name, columns[name], type_=ARRAY(type_)) for name, type_ in BATCH_AREA_COLUMNS]
+        return (
+            func.unnest(*arrays)
+            .table_valued(*(column(name, type_) for name, type_ in BATCH_AREA_COLUMNS))
+            .render_derived(name='geo_area', with_types=False)
+        )
+
+    @classmethod
+    def batch_area_condition(cls, areas):
+        """Условие соединения здания с областью из batch_areas"""
+        return and_(
+            Building.geo_cell.between(areas.c.cell_start, areas.c.cell_end),
+            Building.latitude.between(areas.c.min_lat, areas.c.max_lat),
+            Building.longitude.between(areas.c.min_lng, areas.c.max_lng),
+            or_(
+                areas.c.radius_km.is_(None),
+                cls._haversine_expr(areas.c.lat_rad, areas.c.lng_rad, areas.c.cos_lat) <= areas.c.radius_km,
+            ),
+        )
+
+    @classmethod
+    async def get_batch(cls, db: AsyncSession, geo_queries: List[dict]) -> List[List[dict]]:
+        """Пакетный геопоиск: по списку зданий на каждую область, одним запросом"""
+        if building_index.loaded:
+            return [
+                building_index.in_radius(q['latitude'], q['longitude'], q['radius_km'])
+                if q['radius_km']
+                else building_index.in_rectangle(q['min_lat'], q['max_lat'], q['min_lng'], q['max_lng'])
+                for q in geo_queries
+            ]
+
+        results: List[List[dict]] = [[] for _ in geo_queries]
+        if not geo_queries:
+            return results
+
+        areas = cls.batch_areas(geo_queries)
+        query = (
+            select(areas.c.idx.label(BATCH_INDEX_KEY), *cls.document_columns())
+            .select_from(Building)
+            .join(areas, cls.batch_area_condition(areas))
+            .order_by(areas.c.idx, Building.id)
+        )
+        for document in await cls.fetch_documents(db, query):
+            results[document.pop(BATCH_INDEX_KEY)].append(document)
+        return results
+
+    @classmethod
+    def radius_bbox_filter(cls, lat: float, lng: float, radius_km: float):
+        """Условие попадания в прямоугольники вокруг круга (radius_bboxes); расстояние не проверяется"""
+        return or_(*(cls.bbox_filter(*bbox) for bbox in radius_bboxes(lat, lng, radius_km)))
+
+    @classmethod
+    def bbox_filter(cls, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        """Условие попадания в прямоугольник: диапазоны ячеек по индексу geo_cell и точная проверка координат"""
+        ranges = cell_ranges(min_lat, max_lat, min_lng, max_lng)
+        return and_(
+            or_(*(Building.geo_cell.between(start, end - 1) for start, end in ranges)),
+            Building.latitude.between(min_lat, max_lat),
+            Building.longitude.between(min_lng, max_lng),
+        )
 
     @classmethod
     async def create(cls, db: AsyncSession, building_data: dict) -> Building:
         building = Building(**building_data)
+        building.geo_cell = encode_cell(building.latitude, building.longitude)
         db.add(building)
         await db.commit()
         await db.refresh(building)
+        building_index.add(building.id, building.address, building.latitude, building.longitude)
         return building
 
     @classmethod
     async def update(cls, db: AsyncSession, building_id: int, update_data: dict) -> Optional[Building]:
-        building = await cls.get_by_id(db, building_id)
+        building = await db.get(Building, building_id)
         if building is None:
             return None
 
         for key, value in update_data.items():
             if hasattr(building, key):
                 setattr(building, key, value)
+        building.geo_cell = encode_cell(building.latitude, building.longitude)
 
         await db.commit()
         await db.refresh(building)
+        building_index.update(building.id, building.address, building.latitude, building.longitude)
         return building
 
     @classmethod
     async def delete(cls, db: AsyncSession, building_id: int) -> bool:
-        building = await cls.get_by_id(db, building_id)
+        building = await db.get(Building, building_id)
         if building is None:
             return False
 
+        # Организации здания удаляются каскадом, их убираем из индексов названий
+        organization_ids = (
+            (await db.execute(select(Organization.id).where(Organization.building_id == building_id))).scalars().all()
+        )
+
         await db.delete(building)
         await db.commit()
+        building_index.remove(building_id)
+        for organization_id in organization_ids:
+            organization_name_index.remove(organization_id)
+            organization_trie.remove(organization_id)
         return True
-
-    @staticmethod
-    def _calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        R = 6371.0
-
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-
-        dlon = lon2_rad - lon1_rad
-        dlat = lat2_rad - lat1_rad
-
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        return R * c
@@ -1,166 +1,541 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, Sequence
+from sqlalchemy import insert, select, tuple_, func, cast, literal_column, Select, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 
 from sqlalchemy.orm import selectinload
 
 from app.dao.activity import ActivityDAO
-from app.dao.building import BuildingDAO
-from app.models.activity import organization_activity, Activity
+from app.dao.building import BATCH_INDEX_KEY, BUILDING_COLUMNS, BuildingDAO
+from app.models.activity import organization_activity, activity_closure, Activity
+from app.models.building import Building
 from app.models.organization import Organization, OrganizationPhone
+from app.utils.documents import attach_collection, json_collection, json_object, nested_columns, row_document
+from app.utils.fieldsets import FieldSet
+from app.utils.geo import HALF_EARTH_CIRCUMFERENCE_KM
+from app.utils.name_index import organization_name_index
+from app.utils.name_trie import organization_trie
+from app.utils.pagination import keyset_page
+from app.utils.phone import normalize_phone
+from app.utils.search import name_search
+
+# Поиск ближайших: начальный радиус и множитель его роста на каждом шаге
+NEAREST_START_RADIUS_KM = 1.0
+NEAREST_RADIUS_GROWTH = 4.0
+
+# Поля документа организации для чтения (как в OrganizationDTO)
+ORGANIZATION_DOCUMENT: FieldSet = {
+    'id': None,
+    'name': None,
+    'building_id': None,
+    'building': tuple(column.key for column in BUILDING_COLUMNS),
+    'phones': ('id', 'phone_number'),
+    'activities': ('id', 'name', 'parent_id'),
+}
+
+# Метка расстояния до точки в строках геопоиска
+DISTANCE_KEY = 'distance_km'
+
+# Метка документа, собранного в JSON самим PostgreSQL (select_documents(as_json=True))
+JSON_KEY = 'document'
 
 
 class OrganizationDAO:
     @classmethod
-    async def get_by_id(cls, db: AsyncSession, organization_id: int) -> Optional[Organization]:
-        query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .where(Organization.id == organization_id)
-        )
+    def load_options(cls) -> list:
+        """Связи, которые загружаются вместе с ORM-объектом организации для записи"""
+        return [
+            selectinload(Organization.building),
+            selectinload(Organization.phones),
+            selectinload(Organization.activities),
+        ]
+
+    @classmethod
+    def select_documents(
+        cls,
+        *extra_columns,
+        fields: Optional[FieldSet] = None,
+        join_building: bool = False,
+        as_json: bool = False,
+    ) -> Select:
+        """
+        Core-запрос документов организаций: столбцы организации и здания без ORM-объектов.
+
+        Выбираются все поля документа, либо только запрошенные в fields (и id). Здание
+        присоединяется, если оно запрошено или нужно фильтрам (join_building).
+        Телефоны и виды деятельности дочитывает fetch_documents.
+
+        as_json - документ целиком собирает PostgreSQL (json_document): в строке только id и JSON_KEY.
+        """
+        if fields is None:
+            fields = ORGANIZATION_DOCUMENT
+        if as_json:
+            columns = [Organization.id, cast(cls.json_document(fields), Text).label(JSON_KEY)]
+        else:
+            columns = [getattr(Organization, name) for name, subfields in fields.items() if subfields is None]
+            if 'id' not in fields:
+                columns.insert(0, Organization.id)
+            if 'building' in fields:
+                columns += nested_columns('building', [getattr(Building, name) for name in fields['building']])
+
+        query = select(*columns, *extra_columns).select_from(Organization)
+        if 'building' in fields or join_building:
+            query = query.join(Building, Building.id == Organization.building_id)
+        return query
+
+    @classmethod
+    def json_document(cls, fields: FieldSet):
+        """
+        Документ организации как json_build_object: здание - вложенный объект из соединения,
+        телефоны и виды деятельности - json_agg в коррелированных подзапросах.
+        """
+        pairs = []
+        for name, subfields in fields.items():
+            if subfields is None:
+                value = getattr(Organization, name)
+            elif name == 'building':
+                value = json_object(Building, subfields)
+            elif name == 'phones':
+                value = json_collection(
+                    select(
+                        func.json_agg(
+                            aggregate_order_by(json_object(OrganizationPhone, subfields), OrganizationPhone.id)
+                        )
+                    ).where(OrganizationPhone.organization_id == Organization.id)
+                )
+            else:
+                value = json_collection(
+                    select(func.json_agg(aggregate_order_by(json_object(Activity, subfields), Activity.id)))
+                    .select_from(organization_activity)
+                    .join(Activity, Activity.id == organization_activity.c.activity_id)
+                    .where(organization_activity.c.organization_id == Organization.id)
+                )
+            pairs += [literal_column(f"'{name}'"), value]
+        return func.json_build_object(*pairs)
+
+    @classmethod
+    async def fetch_documents(
+        cls, db: AsyncSession, query: Select, fields: Optional[FieldSet] = None, as_json: bool = False
+    ) -> List[dict]:
+        """Выполнить запрос из select_documents и дочитать коллекции: по запросу на каждую связь"""
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        if as_json:
+            return [dict(row) for row in result.mappings()]
+        documents = [row_document(row) for row in result.mappings()]
+        await cls.attach_collections(db, documents, fields)
+        return documents
 
     @classmethod
-    async def get_by_name(cls, db: AsyncSession, name: str) -> Sequence[Organization]:
-        query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
+    async def attach_collections(
+        cls, db: AsyncSession, documents: List[dict], fields: Optional[FieldSet] = None
+    ) -> None:
+        """Телефоны и виды деятельности документов, если они запрошены"""
+        if fields is None:
+            fields = ORGANIZATION_DOCUMENT
+        if 'phones' in fields:
+            query = select(*(getattr(OrganizationPhone, name) for name in fields['phones'])).order_by(
+                OrganizationPhone.id
             )
-            .where(Organization.name.ilike(f'%{name}%'))
-        )
+            await attach_collection(db, documents, 'phones', query, OrganizationPhone.organization_id)
+        if 'activities' in fields:
+            query = (
+                select(*(getattr(Activity, name) for name in fields['activities']))
+                .join(organization_activity, organization_activity.c.activity_id == Activity.id)
+                .order_by(Activity.id)
+            )
+            await attach_collection(db, documents, 'activities', query, organization_activity.c.organization_id)
+
+    @classmethod
+    async def get_by_id(
+        cls, db: AsyncSession, organization_id: int, fields: Optional[FieldSet] = None
+    ) -> Optional[dict]:
+        query = cls.select_documents(fields=fields).where(Organization.id == organization_id)
+        documents = await cls.fetch_documents(db, query, fields)
+        return documents[0] if documents else None
+
+    @classmethod
+    async def _get_entity(cls, db: AsyncSession, organization_id: int) -> Optional[Organization]:
+        """ORM-объект организации со связями для изменения и удаления"""
+        query = select(Organization).options(*cls.load_options()).where(Organization.id == organization_id)
         result = await db.execute(query)
-        return result.scalars().all()
+        return result.scalar_one_or_none()
 
     @classmethod
-    async def get_by_building(cls, db: AsyncSession, building_id: int) -> Sequence[Organization]:
+    async def get_by_name(
+        cls,
+        db: AsyncSession,
+        name: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        query = cls.select_documents(fields=fields)
+        if organization_name_index.loaded:
+            ids = organization_name_index.search(name, rank=rank)
+            # after_id - ключ страниц по возрастанию ID, с rank сервис его не передаёт
+            if after_id is not None and not rank:
+                ids = [organization_id for organization_id in ids if organization_id > after_id]
+            ids = ids[:limit] if limit is not None else ids
+            if not ids:
+                return []
+            documents = await cls.fetch_documents(db, query.where(Organization.id.in_(ids)), fields)
+            by_id = {document['id']: document for document in documents}
+            return [by_id[organization_id] for organization_id in ids if organization_id in by_id]
+
+        query = name_search(query, Organization.name, name, rank)
+        return await cls.fetch_documents(db, keyset_page(query, Organization.id, limit, after_id), fields)
+
+    @classmethod
+    async def autocomplete(cls, db: AsyncSession, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        if organization_trie.loaded:
+            return organization_trie.complete(prefix, limit)
+
         query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .where(Organization.building_id == building_id)
+            select(Organization.id, Organization.name)
+            .where(Organization.name.ilike(f'{prefix}%'))
+            .order_by(func.lower(Organization.name), Organization.id)
+            .limit(limit)
         )
         result = await db.execute(query)
-        return result.scalars().all()
+        return [tuple(row) for row in result]
 
     @classmethod
-    async def get_by_activity(cls, db: AsyncSession, activity_id: int) -> Sequence[Organization]:
-        activity_ids = await ActivityDAO.get_all_children_ids(db, activity_id)
+    async def get_by_phone(
+        cls,
+        db: AsyncSession,
+        digits: str,
+        suffix: bool = False,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        if suffix:
+            # Шаблон без подстановок в начале: PostgreSQL сводит LIKE к диапазону по индексу
+            condition = OrganizationPhone.phone_digits_reversed.like(f'{digits[::-1]}%')
+        else:
+            condition = OrganizationPhone.phone_digits == digits
 
-        query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .join(organization_activity, Organization.id == organization_activity.c.organization_id)
-            .where(organization_activity.c.activity_id.in_(activity_ids))
-            .distinct()
+        query = cls.select_documents(fields=fields).where(
+            Organization.id.in_(select(OrganizationPhone.organization_id).where(condition))
         )
+        return await cls.fetch_documents(db, keyset_page(query, Organization.id, limit, after_id), fields)
 
-        result = await db.execute(query)
-        return result.scalars().all()
+    @classmethod
+    async def get_by_building(
+        cls, db: AsyncSession, building_id: int, fields: Optional[FieldSet] = None, as_json: bool = False
+    ) -> List[dict]:
+        query = cls.select_documents(fields=fields, as_json=as_json).where(Organization.building_id == building_id)
+        return await cls.fetch_documents(db, query, fields, as_json)
 
     @classmethod
-    async def get_by_activities_tree(cls, db: AsyncSession, activity_name: str) -> Sequence[Organization]:
-        query = select(Activity).where(Activity.name.ilike(f'%{activity_name}%'))
-        result = await db.execute(query)
-        activities = result.scalars().all()
+    async def get_by_activity(
+        cls, db: AsyncSession, activity_id: int, fields: Optional[FieldSet] = None, as_json: bool = False
+    ) -> List[dict]:
+        activity_ids = ActivityDAO.subtree_ids_filter(activity_id)
+        organization_ids = select(organization_activity.c.organization_id).where(
+            organization_activity.c.activity_id.in_(activity_ids)
+        )
 
-        if not activities:
-            return []
+        query = (
+            cls.select_documents(fields=fields, as_json=as_json)
+            .where(Organization.id.in_(organization_ids))
+            .order_by(Organization.id)
+        )
+        return await cls.fetch_documents(db, query, fields, as_json)
+
+    @classmethod
+    async def get_by_activities_tree(
+        cls,
+        db: AsyncSession,
+        activity_name: str,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        matched_subtrees = (
+            select(activity_closure.c.descendant_id)
+            .join(Activity, Activity.id == activity_closure.c.ancestor_id)
+            .where(Activity.name.ilike(f'%{activity_name}%'))
+        )
+        organization_ids = select(organization_activity.c.organization_id).where(
+            organization_activity.c.activity_id.in_(matched_subtrees)
+        )
 
-        all_organizations = []
-        for activity in activities:
-            organizations = await cls.get_by_activity(db, activity.id)
-            all_organizations.extend(org for org in organizations if org not in all_organizations)
+        query = cls.select_documents(fields=fields).where(Organization.id.in_(organization_ids))
+        return await cls.fetch_documents(db, keyset_page(query, Organization.id, limit, after_id), fields)
 
-        return all_organizations
+    @classmethod
+    async def get_in_radius(
+        cls,
+        db: AsyncSession,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+        fields: Optional[FieldSet] = None,
+        as_json: bool = False,
+    ) -> List[Tuple[dict, float]]:
+        """Организации в радиусе с расстоянием в км, по возрастанию расстояния"""
+        return await cls._get_by_distance(
+            db, BuildingDAO.radius_filter(lat, lng, radius_km), lat, lng, limit, after, fields, as_json
+        )
 
     @classmethod
-    async def get_in_radius(cls, db: AsyncSession, lat: float, lng: float, radius_km: float) -> Sequence[Organization]:
-        buildings = await BuildingDAO.get_in_radius(db, lat, lng, radius_km)
-        building_ids = [b.id for b in buildings]
+    async def get_in_rectangle(
+        cls,
+        db: AsyncSession,
+        min_lat: float,
+        max_lat: float,
+        min_lng: float,
+        max_lng: float,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+        fields: Optional[FieldSet] = None,
+        as_json: bool = False,
+    ) -> List[Tuple[dict, float]]:
+        """Организации в прямоугольнике с расстоянием до точки (по умолчанию — центра области)"""
+        if lat is None or lng is None:
+            lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
 
-        if not building_ids:
-            return []
+        return await cls._get_by_distance(
+            db,
+            BuildingDAO.rectangle_filter(min_lat, max_lat, min_lng, max_lng),
+            lat,
+            lng,
+            limit,
+            after,
+            fields,
+            as_json,
+        )
 
+    @classmethod
+    async def _get_by_distance(
+        cls,
+        db: AsyncSession,
+        building_filter,
+        lat: float,
+        lng: float,
+        limit: Optional[int],
+        after: Optional[Tuple[float, int]],
+        fields: Optional[FieldSet] = None,
+        as_json: bool = False,
+    ) -> List[Tuple[dict, float]]:
+        """Страница организаций по ключу (расстояние, id): after — ключ последней записи предыдущей страницы"""
+        distance = BuildingDAO.distance_km_expr(lat, lng)
         query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .where(Organization.building_id.in_(building_ids))
+            cls.select_documents(distance.label(DISTANCE_KEY), fields=fields, join_building=True, as_json=as_json)
+            .where(building_filter)
+            .order_by(distance, Organization.id)
         )
-        result = await db.execute(query)
-        return result.scalars().all()
+        if after is not None:
+            query = query.where(tuple_(distance, Organization.id) > tuple_(*after))
+        if limit is not None:
+            query = query.limit(limit)
+
+        documents = await cls.fetch_documents(db, query, fields, as_json)
+        return [(document, document.pop(DISTANCE_KEY)) for document in documents]
 
     @classmethod
-    async def get_in_rectangle(
-        cls, db: AsyncSession, min_lat: float, max_lat: float, min_lng: float, max_lng: float
-    ) -> Sequence[Organization]:
-        buildings = await BuildingDAO.get_in_rectangle(db, min_lat, max_lat, min_lng, max_lng)
-        building_ids = [b.id for b in buildings]
+    async def search(
+        cls,
+        db: AsyncSession,
+        name: Optional[str] = None,
+        activity_id: Optional[int] = None,
+        building_id: Optional[int] = None,
+        geo_query: Optional[dict] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        """Поиск по любому сочетанию фильтров одним запросом; фильтры объединяются через AND"""
+        query = cls.select_documents(fields=fields, join_building=True)
 
-        if not building_ids:
-            return []
+        # Каждый фильтр - условие с индексом, порядок соединения по селективности выбирает планировщик
+        if building_id is not None:
+            query = query.where(Organization.building_id == building_id)
+        if name is not None:
+            if organization_name_index.loaded:
+                query = query.where(Organization.id.in_(organization_name_index.search(name)))
+            else:
+                query = query.where(Organization.name.ilike(f'%{name}%'))
+        if activity_id is not None:
+            query = query.where(
+                Organization.id.in_(
+                    select(organization_activity.c.organization_id).where(
+                        organization_activity.c.activity_id.in_(ActivityDAO.subtree_ids_filter(activity_id))
+                    )
+                )
+            )
+        if geo_query is not None:
+            if geo_query.get('radius_km'):
+                query = query.where(
+                    BuildingDAO.radius_filter(geo_query['latitude'], geo_query['longitude'], geo_query['radius_km'])
+                )
+            else:
+                query = query.where(
+                    BuildingDAO.rectangle_filter(
+                        geo_query['min_lat'], geo_query['max_lat'], geo_query['min_lng'], geo_query['max_lng']
+                    )
+                )
+
+        return await cls.fetch_documents(db, keyset_page(query, Organization.id, limit, after_id), fields)
+
+    @classmethod
+    async def get_batch(cls, db: AsyncSession, geo_queries: List[dict]) -> List[List[dict]]:
+        """Пакетный геопоиск: по списку организаций на каждую область, одним запросом"""
+        results: List[List[dict]] = [[] for _ in geo_queries]
+        if not geo_queries:
+            return results
 
+        areas = BuildingDAO.batch_areas(geo_queries)
         query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .where(Organization.building_id.in_(building_ids))
+            cls.select_documents(areas.c.idx.label(BATCH_INDEX_KEY))
+            .join(areas, BuildingDAO.batch_area_condition(areas))
+            .order_by(areas.c.idx, Organization.id)
         )
-        result = await db.execute(query)
-        return result.scalars().all()
+        for document in await cls.fetch_documents(db, query):
+            results[document.pop(BATCH_INDEX_KEY)].append(document)
+        return results
 
     @classmethod
-    async def get_all(cls, db: AsyncSession) -> Sequence[Organization]:
-        query = select(Organization).options(
-            selectinload(Organization.building),
-            selectinload(Organization.phones),
-            selectinload(Organization.activities),
+    async def get_nearest(cls, db: AsyncSession, lat: float, lng: float, k: int) -> List[Tuple[dict, float]]:
+        """
+        k ближайших организаций с расстоянием в км.
+
+        Шаг поиска - запрос ближайших (ORDER BY расстояние LIMIT) в круге, отобранном по индексу geo_cell.
+        Если в круге меньше k организаций, найдены все они, и следующий шаг читает только кольцо
+        за прежним радиусом; последний шаг - без ограничения области. С базы приходит не больше k строк,
+        документы читаются один раз, для итоговых k.
+        """
+        distance = BuildingDAO.distance_km_expr(lat, lng)
+        query = (
+            select(Organization.id, distance)
+            .join(Building, Organization.building_id == Building.id)
+            .order_by(distance, Organization.id)
         )
-        result = await db.execute(query)
-        return result.scalars().all()
+        nearest: Dict[int, float] = {}
+        scanned_km, radius_km = None, NEAREST_START_RADIUS_KM
+        while len(nearest) < k:
+            ring_query = query.limit(k - len(nearest))
+            if scanned_km is not None:
+                ring_query = ring_query.where(distance > scanned_km)
+            if radius_km < HALF_EARTH_CIRCUMFERENCE_KM:
+                ring_query = ring_query.where(
+                    BuildingDAO.radius_bbox_filter(lat, lng, radius_km), distance <= radius_km
+                )
+            nearest.update((await db.execute(ring_query)).all())
+            if radius_km >= HALF_EARTH_CIRCUMFERENCE_KM:
+                break
+            scanned_km, radius_km = radius_km, radius_km * NEAREST_RADIUS_GROWTH
+
+        if not nearest:
+            return []
+
+        documents = await cls.fetch_documents(db, cls.select_documents().where(Organization.id.in_(nearest)))
+        documents.sort(key=lambda document: (nearest[document['id']], document['id']))
+        return [(document, nearest[document['id']]) for document in documents]
+
+    @classmethod
+    async def get_all(
+        cls,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> List[dict]:
+        query = cls.select_documents(fields=fields)
+        return await cls.fetch_documents(db, keyset_page(query, Organization.id, limit, after_id), fields)
+
+    @classmethod
+    async def stream_all(cls, db: AsyncSession, chunk_size: int) -> AsyncIterator[List[dict]]:
+        """Все организации порциями по chunk_size через серверный курсор, без загрузки таблицы в память"""
+        query = cls.select_documents().order_by(Organization.id).execution_options(yield_per=chunk_size)
+        result = await db.stream(query)
+        async for rows in result.mappings().partitions():
+            documents = [row_document(row) for row in rows]
+            await cls.attach_collections(db, documents)
+            yield documents
 
     @classmethod
     async def create(cls, db: AsyncSession, organization_data: dict) -> Organization:
         organization = Organization(**organization_data)
         db.add(organization)
         await db.commit()
-        query = (
-            select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.activities),
-            )
-            .where(Organization.id == organization.id)
-        )
+        organization_name_index.add(organization.id, organization.name)
+        organization_trie.add(organization.id, organization.name)
+        query = select(Organization).options(*cls.load_options()).where(Organization.id == organization.id)
 
         result = await db.execute(query)
         return result.scalar_one()
 
+    @classmethod
+    async def create_many(cls, db: AsyncSession, organizations_data: List[Dict]) -> List[dict]:
+        """
+        Создать организации с телефонами и видами деятельности в одной транзакции.
+
+        Каждая таблица заполняется одним пакетным INSERT (insertmanyvalues: многострочный
+        VALUES ... RETURNING для организаций). Возвращает документы созданных организаций
+        в порядке входных данных.
+        """
+        building_ids = {item['building_id'] for item in organizations_data}
+        activity_ids = {activity_id for item in organizations_data for activity_id in item['activity_ids']}
+        missing_buildings = building_ids - set(
+            (await db.scalars(select(Building.id).where(Building.id.in_(building_ids)))).all()
+        )
+        if missing_buildings:
+            raise ValueError(f'Unknown building_id: {sorted(missing_buildings)}')
+        missing_activities = activity_ids - set(
+            (await db.scalars(select(Activity.id).where(Activity.id.in_(activity_ids)))).all()
+        )
+        if missing_activities:
+            raise ValueError(f'Unknown activity_id: {sorted(missing_activities)}')
+
+        organization_ids = (
+            await db.scalars(
+                insert(Organization).returning(Organization.id, sort_by_parameter_order=True),
+                [{'name': item['name'], 'building_id': item['building_id']} for item in organizations_data],
+            )
+        ).all()
+
+        phones = []
+        links = []
+        for organization_id, item in zip(organization_ids, organizations_data):
+            for phone_number in item['phone_numbers']:
+                phone_digits = normalize_phone(phone_number)
+                phones.append(
+                    {
+                        'organization_id': organization_id,
+                        'phone_number': phone_number,
+                        'phone_digits': phone_digits,
+                        'phone_digits_reversed': phone_digits[::-1],
+                    }
+                )
+            # Повтор вида деятельности в одной организации нарушил бы первичный ключ связи
+            links += [
+                {'organization_id': organization_id, 'activity_id': activity_id}
+                for activity_id in dict.fromkeys(item['activity_ids'])
+            ]
+        if phones:
+            await db.execute(insert(OrganizationPhone), phones)
+        if links:
+            await db.execute(insert(organization_activity), links)
+        await db.commit()
+
+        for organization_id, item in zip(organization_ids, organizations_data):
+            organization_name_index.add(organization_id, item['name'])
+            organization_trie.add(organization_id, item['name'])
+
+        documents = await cls.fetch_documents(db, cls.select_documents().where(Organization.id.in_(organization_ids)))
+        by_id = {document['id']: document for document in documents}
+        return [by_id[organization_id] for organization_id in organization_ids]
+
     @classmethod
     async def update(cls, db: AsyncSession, organization_id: int, update_data: dict) -> Optional[Organization]:
-        organization = await cls.get_by_id(db, organization_id)
+        organization = await cls._get_entity(db, organization_id)
         if organization is None:
             return None
 
@@ -170,25 +545,32 @@ class OrganizationDAO:
 
         await db.commit()
         await db.refresh(organization)
+        organization_name_index.update(organization.id, organization.name)
+        organization_trie.update(organization.id, organization.name)
         return organization
 
     @classmethod
     async def delete(cls, db: AsyncSession, organization_id: int) -> bool:
-        organization = await cls.get_by_id(db, organization_id)
+        organization = await cls._get_entity(db, organization_id)
         if organization is None:
             return False
 
         await db.delete(organization)
         await db.commit()
+        organization_name_index.remove(organization_id)
+        organization_trie.remove(organization_id)
         return True
 
     @classmethod
     async def add_phone(
         cls, db: AsyncSession, organization_id: int, phone_number: str, is_primary: bool = False
     ) -> OrganizationPhone:
+        phone_digits = normalize_phone(phone_number)
         phone = OrganizationPhone(
             organization_id=organization_id,
             phone_number=phone_number,
+            phone_digits=phone_digits,
+            phone_digits_reversed=phone_digits[::-1],
         )
         db.add(phone)
         await db.commit()
@@ -1,4 +1,7 @@
 from typing import Optional, List
+
+from pydantic import Field
+
 from app.dto.base_dto import BaseDTO
 
 
@@ -16,6 +19,17 @@ class ActivityDTO(BaseDTO):
     parent: Optional['ActivitySimpleDTO'] = None
 
 
+class ActivityNameDTO(BaseDTO):
+    id: int
+    name: str
+
+
 class ActivityCreateDTO(BaseDTO):
     name: str
     parent_id: Optional[int] = None
+
+
+class ActivityTreeDTO(BaseDTO):
+    id: int
+    name: str
+    children: List['ActivityTreeDTO'] = Field(default_factory=list)
@@ -1,5 +1,9 @@
 from typing import Optional, List, Any
 from app.dto.base_dto import BaseDTO
+from app.utils.fieldsets import fieldset_schema
+
+# Максимальное число областей в одном пакетном геопоиске
+GEO_BATCH_MAX_SIZE = 1000
 
 
 class BuildingSimpleDTO(BaseDTO):
@@ -31,3 +35,7 @@ class GeoQueryDTO(BaseDTO):
 
 class BuildingWithOrganizationsDTO(BuildingDTO):
     organizations: List[Any]
+
+
+# Поля, допустимые в параметре fields= для зданий
+BUILDING_FIELDS = fieldset_schema(BuildingDTO)
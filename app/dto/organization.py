@@ -1,7 +1,11 @@
 from typing import Optional, List
 from app.dto.activity import ActivitySimpleDTO
-from app.dto.building import BuildingSimpleDTO
+from app.dto.building import BUILDING_FIELDS, BuildingSimpleDTO, GeoQueryDTO
 from app.dto.base_dto import BaseDTO
+from app.utils.fieldsets import fieldset_schema
+
+# Максимальное число организаций в одном пакетном создании
+ORGANIZATION_BULK_MAX_SIZE = 5000
 
 
 class PhoneDTO(BaseDTO):
@@ -15,6 +19,11 @@ class OrganizationBaseDTO(BaseDTO):
     building_id: int
 
 
+class OrganizationNameDTO(BaseDTO):
+    id: int
+    name: str
+
+
 class OrganizationCreateDTO(BaseDTO):
     name: str
     building_id: int
@@ -29,7 +38,23 @@ class OrganizationUpdateDTO(BaseDTO):
     activity_ids: Optional[List[int]] = None
 
 
+class OrganizationSearchDTO(BaseDTO):
+    name: Optional[str] = None
+    activity_id: Optional[int] = None
+    building_id: Optional[int] = None
+    geo: Optional[GeoQueryDTO] = None
+
+
 class OrganizationDTO(OrganizationBaseDTO):
     building: BuildingSimpleDTO
     phones: List[PhoneDTO]
     activities: List[ActivitySimpleDTO]
+
+
+class OrganizationDistanceDTO(OrganizationDTO):
+    distance_km: float
+
+
+# Поля, допустимые в параметре fields= для организаций и для здания с организациями
+ORGANIZATION_FIELDS = fieldset_schema(OrganizationDTO)
+BUILDING_WITH_ORGANIZATIONS_FIELDS = {**BUILDING_FIELDS, 'organizations': tuple(OrganizationBaseDTO.model_fields)}
@@ -14,8 +14,23 @@ organization_activity = sa.Table(
     sa.Column('activity_id', sa.Integer, sa.ForeignKey('activity.id'), primary_key=True),
 )
 
+# Таблица замыкания: все пары (предок, потомок) дерева видов деятельности,
+# включая пару (id, id) с depth = 0 для каждого узла
+activity_closure = sa.Table(
+    'activity_closure',
+    Base.metadata,
+    sa.Column('ancestor_id', sa.Integer, sa.ForeignKey('activity.id', ondelete='CASCADE'), primary_key=True),
+    sa.Column('descendant_id', sa.Integer, sa.ForeignKey('activity.id', ondelete='CASCADE'), primary_key=True),
+    sa.Column('depth', sa.Integer, nullable=False),
+    sa.Index('ix_activity_closure_descendant_id', 'descendant_id', 'depth'),
+)
+
 
 class Activity(Base):
+    __table_args__ = (
+        sa.Index('ix_activity_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(sa.String(255), unique=True, nullable=False, index=True)
     parent_id: Mapped[Optional[int]] = mapped_column(sa.Integer, ForeignKey('activity.id'), nullable=True)
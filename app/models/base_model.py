@@ -16,5 +16,13 @@ class Base:
         return self.__name__.lower()
 
 
+# Триграммные GIN-индексы для поиска по подстроке требуют расширения pg_trgm
+sa.event.listen(
+    Base.metadata,
+    'before_create',
+    sa.DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'),
+)
+
+
 def aware_utcnow():
     return datetime.now(UTC).replace(tzinfo=None)
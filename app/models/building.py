@@ -7,10 +7,18 @@ from app.models.base_model import Base
 
 
 class Building(Base):
+    __table_args__ = (
+        sa.Index(
+            'ix_building_address_trgm', 'address', postgresql_using='gin', postgresql_ops={'address': 'gin_trgm_ops'}
+        ),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     address: Mapped[str] = mapped_column(sa.String(500), nullable=False, index=True)
     latitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
     longitude: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    # Ячейка сетки (app.utils.geo.encode_cell) для предфильтрации геопоиска по индексу
+    geo_cell: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, index=True)
 
     organizations: Mapped[List['Organization']] = relationship(
         'Organization', back_populates='building', cascade='all, delete-orphan', lazy='select'
@@ -10,15 +10,31 @@ from app.models.building import Building
 
 
 class OrganizationPhone(Base):
+    __table_args__ = (
+        # text_pattern_ops: LIKE 'prefix%' по развёрнутым цифрам использует индекс при любой локали
+        sa.Index(
+            'ix_organizationphone_phone_digits_reversed',
+            'phone_digits_reversed',
+            postgresql_ops={'phone_digits_reversed': 'text_pattern_ops'},
+        ),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     organization_id: Mapped[int] = mapped_column(
         sa.Integer, ForeignKey('organization.id', ondelete='CASCADE'), nullable=False
     )
     phone_number: Mapped[str] = mapped_column(sa.String(50), nullable=False, index=True)
+    # Только цифры номера (app.utils.phone.normalize_phone) и они же в обратном порядке для поиска по окончанию
+    phone_digits: Mapped[str] = mapped_column(sa.String(50), nullable=False, index=True)
+    phone_digits_reversed: Mapped[str] = mapped_column(sa.String(50), nullable=False)
     organization: Mapped['Organization'] = relationship('Organization', back_populates='phones', lazy='select')
 
 
 class Organization(Base):
+    __table_args__ = (
+        sa.Index('ix_organization_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(sa.String(255), nullable=False, index=True)
     building_id: Mapped[int] = mapped_column(sa.Integer, ForeignKey('building.id'), nullable=False)
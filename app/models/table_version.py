@@ -0,0 +1,59 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base_model import Base
+
+# Таблица -> версия, которую меняет запись в неё. Телефоны и связи с видами деятельности
+# входят в документ организации, таблица замыкания - в дерево видов деятельности.
+# Существующим базам триггеры ставит миграция 1f02962b97b1 со своей, замороженной копией списка:
+# новая таблица здесь требует и новой миграции с её триггером.
+VERSIONED_TABLES = {
+    'activity': 'activity',
+    'activity_closure': 'activity',
+    'building': 'building',
+    'organization': 'organization',
+    'organizationphone': 'organization',
+    'organization_activity': 'organization',
+}
+
+
+class TableVersion(Base):
+    """
+    Версии данных для ETag условных GET-запросов (app/utils/versions.py).
+
+    version меняют триггеры на каждый INSERT/UPDATE/DELETE/TRUNCATE, в той же транзакции:
+    записи из скриптов, миграций, ручного SQL и других процессов учитываются так же, как через DAO.
+    Значение - номер транзакции (txid_current), поэтому оно не повторяется и после пересоздания таблиц.
+    """
+
+    table_name: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+
+# Цена версий в базе: каждый пишущий оператор обновляет строку своей версии и держит её блокировку
+# до конца транзакции. Конкурентные записи в таблицы одной версии (например, все записи организаций,
+# включая пакетные /organizations/bulk) поэтому выполняются по очереди, ожидая commit предыдущей.
+BUMP_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tableversion (table_name, version) VALUES (TG_ARGV[0], txid_current())
+    ON CONFLICT (table_name) DO UPDATE SET version = EXCLUDED.version;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def version_trigger(table: str, version: str) -> str:
+    return (
+        f'CREATE OR REPLACE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+        f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('{version}')"
+    )
+
+
+# create_all (main.py, db_scripts/init_db.py) создаёт и триггеры; для существующих баз - миграция
+sa.event.listen(Base.metadata, 'after_create', sa.DDL(BUMP_VERSION_FUNCTION).execute_if(dialect='postgresql'))
+for _table, _version in VERSIONED_TABLES.items():
+    sa.event.listen(
+        Base.metadata, 'after_create', sa.DDL(version_trigger(_table, _version)).execute_if(dialect='postgresql')
+    )
@@ -1,36 +1,58 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import logging
 
 from app.dao.activity import ActivityDAO
-from app.dto.activity import ActivityDTO
+from app.dto.activity import ActivityDTO, ActivityNameDTO
+from app.utils.pagination import split_page
 
 logger = logging.getLogger(__name__)
 
 
 class ActivityService:
     @staticmethod
-    async def get_activity_by_id(db: AsyncSession, activity_id: int) -> Optional[Dict[str, Any]]:
+    async def get_activity_by_id(db: AsyncSession, activity_id: int) -> Optional[ActivityDTO]:
         """Получить вид деятельности по ID"""
         try:
             activity = await ActivityDAO.get_by_id(db, activity_id)
-            return ActivityDTO.model_validate(activity).model_dump() if activity else None
+            return ActivityDTO.model_validate(activity) if activity else None
         except Exception as e:
             logger.error(f'Error getting activity by id {activity_id}: {e}')
             raise
 
     @staticmethod
-    async def get_root_activities(db: AsyncSession) -> List[Dict[str, Any]]:
+    async def get_root_activities(db: AsyncSession) -> List[ActivityDTO]:
         """Получить корневые виды деятельности"""
         try:
             activities = await ActivityDAO.get_root_activities(db)
-            return [ActivityDTO.model_validate(act).model_dump() for act in activities]
+            return [ActivityDTO.model_validate(act) for act in activities]
         except Exception as e:
             logger.error(f'Error getting root activities: {e}')
             raise
 
     @staticmethod
-    async def get_children_activities(db: AsyncSession, parent_id: int, max_depth: int = 3) -> List[ActivityDTO]:
+    async def get_activity_tree(db: AsyncSession) -> List[Dict[str, Any]]:
+        """Получить всё дерево видов деятельности"""
+        try:
+            rows = await ActivityDAO.get_flat_tree(db)
+
+            nodes = {activity_id: {'id': activity_id, 'name': name, 'children': []} for activity_id, name, _ in rows}
+            roots = []
+            for activity_id, _, parent_id in rows:
+                if parent_id in nodes:
+                    nodes[parent_id]['children'].append(nodes[activity_id])
+                else:
+                    roots.append(nodes[activity_id])
+
+            return roots
+        except Exception as e:
+            logger.error(f'Error getting activity tree: {e}')
+            raise
+
+    @staticmethod
+    async def get_children_activities(
+        db: AsyncSession, parent_id: int, max_depth: Optional[int] = None
+    ) -> List[ActivityDTO]:
         """Получить дочерние виды деятельности"""
         try:
             activities = await ActivityDAO.get_children(db, parent_id, max_depth)
@@ -40,15 +62,48 @@ class ActivityService:
             raise
 
     @staticmethod
-    async def search_activities_by_name(db: AsyncSession, name: str) -> List[Dict[str, Any]]:
-        """Поиск видов деятельности по названию"""
+    async def get_ancestor_activities(db: AsyncSession, activity_id: int) -> List[ActivityDTO]:
+        """Получить родительские виды деятельности всех уровней"""
         try:
-            activity = await ActivityDAO.get_by_name(db, name)
-            return [ActivityDTO.model_validate(activity).model_dump()] if activity else []
+            activities = await ActivityDAO.get_ancestors(db, activity_id)
+            return [ActivityDTO.model_validate(act) for act in activities]
+        except Exception as e:
+            logger.error(f'Error getting ancestor activities for {activity_id}: {e}')
+            raise
+
+    @staticmethod
+    async def search_activities_by_name(
+        db: AsyncSession,
+        name: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+    ) -> Tuple[List[ActivityDTO], Optional[int]]:
+        """
+        Поиск видов деятельности по названию; вторым значением — after_id следующей страницы.
+
+        Ранжированная выдача (rank) - одна страница: after_id работает только для порядка по ID.
+        """
+        try:
+            if rank and after_id is not None:
+                raise ValueError('after_id cannot be combined with rank')
+            activities = await ActivityDAO.get_by_name(db, name, limit + 1 if limit else None, rank, after_id)
+            page, next_after_id = split_page(activities, limit)
+            return [ActivityDTO.model_validate(act) for act in page], None if rank else next_after_id
         except Exception as e:
             logger.error(f'Error searching activities by name {name}: {e}')
             raise
 
+    @staticmethod
+    async def autocomplete_activities(db: AsyncSession, prefix: str, limit: int) -> List[ActivityNameDTO]:
+        """Дополнение названий видов деятельности по префиксу"""
+        try:
+            completions = await ActivityDAO.autocomplete(db, prefix, limit)
+            return [ActivityNameDTO(id=activity_id, name=name) for activity_id, name in completions]
+        except Exception as e:
+            logger.error(f'Error autocompleting activities by prefix {prefix}: {e}')
+            raise
+
     @staticmethod
     async def create_activity(db: AsyncSession, activity_data: Dict[str, Any]) -> ActivityDTO:
         """Создать новый вид деятельности"""
@@ -81,11 +136,14 @@ class ActivityService:
             raise
 
     @staticmethod
-    async def get_all_activities(db: AsyncSession) -> List[Dict[str, Any]]:
-        """Получить все виды деятельности"""
+    async def get_all_activities(
+        db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None
+    ) -> Tuple[List[ActivityDTO], Optional[int]]:
+        """Получить виды деятельности по возрастанию ID; вторым значением — after_id следующей страницы"""
         try:
-            activities = await ActivityDAO.get_all(db)
-            return [ActivityDTO.model_validate(act).model_dump() for act in activities]
+            activities = await ActivityDAO.get_all(db, limit + 1 if limit else None, after_id)
+            page, next_after_id = split_page(activities, limit)
+            return [ActivityDTO.model_validate(act) for act in page], next_after_id
         except Exception as e:
             logger.error(f'Error getting all activities: {e}')
             raise
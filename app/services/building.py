@@ -1,68 +1,133 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
 import logging
 
 from app.dao.building import BuildingDAO
 from app.dao.organization import OrganizationDAO
-from app.dto.building import BuildingDTO
+from app.dto.building import BuildingDTO, BuildingWithOrganizationsDTO
 from app.dto.organization import OrganizationBaseDTO
+from app.utils.fieldsets import FieldSet, project, shape
+from app.utils.pagination import split_page
 
 logger = logging.getLogger(__name__)
 
 
 class BuildingService:
     @staticmethod
-    async def get_building_by_id(db: AsyncSession, building_id: int) -> Optional[Dict[str, Any]]:
+    async def get_building_by_id(db: AsyncSession, building_id: int) -> Optional[BuildingDTO]:
         """Получить здание по ID"""
         try:
             building = await BuildingDAO.get_by_id(db, building_id)
-            return BuildingDTO.model_validate(building).model_dump() if building else None
+            return BuildingDTO.model_validate(building) if building else None
         except Exception as e:
             logger.error(f'Error getting building by id {building_id}: {e}')
             raise
 
+    @staticmethod
+    async def search_buildings_by_address(
+        db: AsyncSession,
+        address: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[List[Union[BuildingDTO, Dict[str, Any]]], Optional[int]]:
+        """
+        Поиск зданий по адресу; вторым значением — after_id следующей страницы.
+
+        С rank возвращаются только limit самых похожих адресов, без следующей страницы.
+        """
+        try:
+            if rank and after_id is not None:
+                raise ValueError('after_id cannot be combined with rank')
+            buildings = await BuildingDAO.get_by_address(
+                db, address, limit + 1 if limit else None, rank, after_id, fields
+            )
+            page, next_after_id = split_page(buildings, limit)
+            return [shape(BuildingDTO, b, fields) for b in page], None if rank else next_after_id
+        except Exception as e:
+            logger.error(f'Error searching buildings by address {address}: {e}')
+            raise
+
     @staticmethod
     async def get_buildings_in_radius(
-        db: AsyncSession, lat: float, lng: float, radius_km: float
-    ) -> List[Dict[str, Any]]:
+        db: AsyncSession, lat: float, lng: float, radius_km: float, fields: Optional[FieldSet] = None
+    ) -> List[Union[BuildingDTO, Dict[str, Any]]]:
         """Получить здания в радиусе"""
         try:
-            buildings = await BuildingDAO.get_in_radius(db, lat, lng, radius_km)
-            return [BuildingDTO.model_validate(b).model_dump() for b in buildings]
+            buildings = await BuildingDAO.get_in_radius(db, lat, lng, radius_km, fields)
+            return [shape(BuildingDTO, b, fields) for b in buildings]
         except Exception as e:
             logger.error(f'Error getting buildings in radius {radius_km}km from ({lat}, {lng}): {e}')
             raise
 
     @staticmethod
     async def get_buildings_in_rectangle(
-        db: AsyncSession, min_lat: float, max_lat: float, min_lng: float, max_lng: float
-    ) -> List[Dict[str, Any]]:
+        db: AsyncSession,
+        min_lat: float,
+        max_lat: float,
+        min_lng: float,
+        max_lng: float,
+        fields: Optional[FieldSet] = None,
+    ) -> List[Union[BuildingDTO, Dict[str, Any]]]:
         """Получить здания в прямоугольной области"""
         try:
-            buildings = await BuildingDAO.get_in_rectangle(db, min_lat, max_lat, min_lng, max_lng)
-            return [BuildingDTO.model_validate(b).model_dump() for b in buildings]
+            buildings = await BuildingDAO.get_in_rectangle(db, min_lat, max_lat, min_lng, max_lng, fields)
+            return [shape(BuildingDTO, b, fields) for b in buildings]
         except Exception as e:
             logger.error(f'Error getting buildings in rectangle: {e}')
             raise
 
     @staticmethod
-    async def get_building_with_organizations(db: AsyncSession, building_id: int) -> Optional[Dict[str, Any]]:
-        """Получить здание с организациями"""
+    async def search_buildings_by_geo_batch(
+        db: AsyncSession, geo_queries: List[Dict[str, Any]]
+    ) -> List[List[BuildingDTO]]:
+        """Пакетный поиск зданий по геолокации"""
         try:
+            batch = await BuildingDAO.get_batch(db, geo_queries)
+            return [[BuildingDTO.model_validate(b) for b in buildings] for buildings in batch]
+        except Exception as e:
+            logger.error(f'Error searching buildings by geo batch of {len(geo_queries)}: {e}')
+            raise
+
+    @staticmethod
+    async def get_building_with_organizations(
+        db: AsyncSession, building_id: int, fields: Optional[FieldSet] = None
+    ) -> Optional[Union[BuildingWithOrganizationsDTO, Dict[str, Any]]]:
+        """Получить здание с организациями; при заданных fields - только запрошенные поля"""
+        try:
+            if fields is not None:
+                return await BuildingService._building_fields(db, building_id, fields)
+
             building = await BuildingDAO.get_by_id(db, building_id)
             if not building:
                 return None
 
             organizations = await OrganizationDAO.get_by_building(db, building_id)
 
-            result = BuildingDTO.model_validate(building).model_dump()
-            result['organizations'] = [OrganizationBaseDTO.model_validate(org).model_dump() for org in organizations]
-
-            return result
+            return BuildingWithOrganizationsDTO(
+                **BuildingDTO.model_validate(building).model_dump(),
+                organizations=[OrganizationBaseDTO.model_validate(org) for org in organizations],
+            )
         except Exception as e:
             logger.error(f'Error getting building with organizations {building_id}: {e}')
             raise
 
+    @staticmethod
+    async def _building_fields(db: AsyncSession, building_id: int, fields: FieldSet) -> Optional[Dict[str, Any]]:
+        """Здание с запрошенными полями: организации читаются, только если они запрошены"""
+        building_fields = {name: None for name in fields if name != 'organizations'}
+        building = await BuildingDAO.get_by_id(db, building_id, building_fields)
+        if not building:
+            return None
+
+        result = project(building, building_fields)
+        if 'organizations' in fields:
+            organization_fields = {name: None for name in fields['organizations']}
+            organizations = await OrganizationDAO.get_by_building(db, building_id, organization_fields)
+            result['organizations'] = [project(org, organization_fields) for org in organizations]
+        return result
+
     @staticmethod
     async def create_building(db: AsyncSession, building_data: Dict[str, Any]) -> Dict[str, Any]:
         """Создать новое здание"""
@@ -95,11 +160,14 @@ class BuildingService:
             raise
 
     @staticmethod
-    async def get_all_buildings(db: AsyncSession) -> List[Dict[str, Any]]:
-        """Получить все здания"""
+    async def get_all_buildings(
+        db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None, fields: Optional[FieldSet] = None
+    ) -> Tuple[List[Union[BuildingDTO, Dict[str, Any]]], Optional[int]]:
+        """Получить здания по возрастанию ID; вторым значением — after_id следующей страницы"""
         try:
-            buildings = await BuildingDAO.get_all(db)
-            return [BuildingDTO.model_validate(b).model_dump() for b in buildings]
+            buildings = await BuildingDAO.get_all(db, limit + 1 if limit else None, after_id, fields)
+            page, next_after_id = split_page(buildings, limit)
+            return [shape(BuildingDTO, b, fields) for b in page], next_after_id
         except Exception as e:
             logger.error(f'Error getting all buildings: {e}')
             raise
@@ -1,90 +1,296 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple, Union
 import logging
 
-from app.dao.organization import OrganizationDAO
-from app.dto.organization import OrganizationDTO
+import settings
+from app.dao.organization import JSON_KEY, OrganizationDAO
+from app.dto.organization import OrganizationDTO, OrganizationDistanceDTO, OrganizationNameDTO
+from app.utils.fieldsets import FieldSet, shape
+from app.utils.pagination import decode_cursor, encode_cursor, split_page
+from app.utils.phone import normalize_phone
+from app.utils.serialization import RawJSON, json_array
 
 logger = logging.getLogger(__name__)
 
+# Число организаций, читаемых из курсора и сериализуемых за один шаг выгрузки
+EXPORT_CHUNK_SIZE = 500
+
+# Список организаций: DTO или словари с запрошенными полями, либо JSON-массив, собранный PostgreSQL
+OrganizationList = Union[List[Union[OrganizationDTO, Dict[str, Any]]], RawJSON]
+
 
 class OrganizationService:
     @staticmethod
-    async def get_organization_by_id(db: AsyncSession, organization_id: int) -> Optional[OrganizationDTO]:
+    async def get_organization_by_id(
+        db: AsyncSession, organization_id: int, fields: Optional[FieldSet] = None
+    ) -> Optional[Union[OrganizationDTO, Dict[str, Any]]]:
         """Получить организацию по ID"""
         try:
-            organization = await OrganizationDAO.get_by_id(db, organization_id)
+            organization = await OrganizationDAO.get_by_id(db, organization_id, fields)
             if not organization:
                 return None
-            return OrganizationDTO.model_validate(organization)
+            return shape(OrganizationDTO, organization, fields)
         except Exception as e:
             logger.error(f'Error getting organization by id {organization_id}: {e}')
             raise
 
     @staticmethod
-    async def get_organizations_by_building(db: AsyncSession, building_id: int) -> List[OrganizationDTO]:
+    async def get_organizations_by_building(
+        db: AsyncSession, building_id: int, fields: Optional[FieldSet] = None
+    ) -> OrganizationList:
         """Получить все организации в здании"""
         try:
-            organizations = await OrganizationDAO.get_by_building(db, building_id)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            organizations = await OrganizationDAO.get_by_building(
+                db, building_id, fields, settings.ORGANIZATION_JSON_AGG
+            )
+            return OrganizationService._organizations(organizations, fields, settings.ORGANIZATION_JSON_AGG)
         except Exception as e:
             logger.error(f'Error getting organizations for building {building_id}: {e}')
             raise
 
     @staticmethod
-    async def get_organizations_by_activity(db: AsyncSession, activity_id: int) -> List[OrganizationDTO]:
+    async def get_organizations_by_activity(
+        db: AsyncSession, activity_id: int, fields: Optional[FieldSet] = None
+    ) -> OrganizationList:
         """Получить организации по виду деятельности"""
         try:
-            organizations = await OrganizationDAO.get_by_activity(db, activity_id)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            organizations = await OrganizationDAO.get_by_activity(
+                db, activity_id, fields, settings.ORGANIZATION_JSON_AGG
+            )
+            return OrganizationService._organizations(organizations, fields, settings.ORGANIZATION_JSON_AGG)
         except Exception as e:
             logger.error(f'Error getting organizations for activity {activity_id}: {e}')
             raise
 
     @staticmethod
-    async def search_organizations_by_name(db: AsyncSession, name: str) -> List[OrganizationDTO]:
-        """Поиск организаций по названию"""
+    async def search_organizations_by_name(
+        db: AsyncSession,
+        name: str,
+        limit: Optional[int] = None,
+        rank: bool = False,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
+        """
+        Поиск организаций по названию; вторым значением — after_id следующей страницы.
+
+        С rank выдача - одна страница лучших совпадений: страницы идут по ID, поэтому следующей нет.
+        """
         try:
-            organizations = await OrganizationDAO.get_by_name(db, name)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            if rank and after_id is not None:
+                raise ValueError('after_id cannot be combined with rank')
+            organizations = await OrganizationDAO.get_by_name(
+                db, name, limit + 1 if limit else None, rank, after_id, fields
+            )
+            page, next_after_id = OrganizationService._id_page(organizations, limit, fields)
+            return page, None if rank else next_after_id
         except Exception as e:
             logger.error(f'Error searching organizations by name {name}: {e}')
             raise
 
     @staticmethod
-    async def search_organizations_by_activity_tree(db: AsyncSession, activity_name: str) -> List[OrganizationDTO]:
+    async def search_organizations_by_phone(
+        db: AsyncSession,
+        phone: str,
+        suffix: bool = False,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
+        """Поиск организаций по номеру телефона (полностью или по окончанию)"""
+        try:
+            digits = normalize_phone(phone)
+            if not digits:
+                raise ValueError('Phone number must contain digits')
+            organizations = await OrganizationDAO.get_by_phone(
+                db, digits, suffix, limit + 1 if limit else None, after_id, fields
+            )
+            return OrganizationService._id_page(organizations, limit, fields)
+        except Exception as e:
+            logger.error(f'Error searching organizations by phone {phone}: {e}')
+            raise
+
+    @staticmethod
+    async def autocomplete_organizations(db: AsyncSession, prefix: str, limit: int) -> List[OrganizationNameDTO]:
+        """Дополнение названий организаций по префиксу"""
+        try:
+            completions = await OrganizationDAO.autocomplete(db, prefix, limit)
+            return [OrganizationNameDTO(id=organization_id, name=name) for organization_id, name in completions]
+        except Exception as e:
+            logger.error(f'Error autocompleting organizations by prefix {prefix}: {e}')
+            raise
+
+    @staticmethod
+    async def search_organizations_by_activity_tree(
+        db: AsyncSession,
+        activity_name: str,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
         """Поиск организаций по дереву деятельности"""
         try:
-            organizations = await OrganizationDAO.get_by_activities_tree(db, activity_name)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            organizations = await OrganizationDAO.get_by_activities_tree(
+                db, activity_name, limit + 1 if limit else None, after_id, fields
+            )
+            return OrganizationService._id_page(organizations, limit, fields)
         except Exception as e:
             logger.error(f'Error searching organizations by activity tree {activity_name}: {e}')
             raise
 
     @staticmethod
     async def get_organizations_in_radius(
-        db: AsyncSession, lat: float, lng: float, radius_km: float
-    ) -> List[OrganizationDTO]:
-        """Получить организации в радиусе"""
+        db: AsyncSession,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[OrganizationList, Optional[str]]:
+        """Получить организации в радиусе, по возрастанию расстояния; вторым значением — курсор следующей страницы"""
         try:
-            organizations = await OrganizationDAO.get_in_radius(db, lat, lng, radius_km)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            after = decode_cursor(cursor, (float, int)) if cursor else None
+            rows = await OrganizationDAO.get_in_radius(
+                db,
+                lat,
+                lng,
+                radius_km,
+                limit=limit + 1 if limit else None,
+                after=after,
+                fields=fields,
+                as_json=settings.ORGANIZATION_JSON_AGG,
+            )
+            return OrganizationService._distance_page(rows, limit, fields, settings.ORGANIZATION_JSON_AGG)
         except Exception as e:
             logger.error(f'Error getting organizations in radius {radius_km}km from ({lat}, {lng}): {e}')
             raise
 
+    @staticmethod
+    async def search_organizations(
+        db: AsyncSession,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
+        """Поиск организаций по сочетанию фильтров: название, вид деятельности, здание, геолокация"""
+        try:
+            organizations = await OrganizationDAO.search(
+                db,
+                name=filters.get('name'),
+                activity_id=filters.get('activity_id'),
+                building_id=filters.get('building_id'),
+                geo_query=filters.get('geo'),
+                limit=limit + 1 if limit else None,
+                after_id=after_id,
+                fields=fields,
+            )
+            return OrganizationService._id_page(organizations, limit, fields)
+        except Exception as e:
+            logger.error(f'Error searching organizations by filters {filters}: {e}')
+            raise
+
+    @staticmethod
+    async def search_organizations_by_geo_batch(
+        db: AsyncSession, geo_queries: List[Dict[str, Any]]
+    ) -> List[List[OrganizationDTO]]:
+        """Пакетный поиск организаций по геолокации"""
+        try:
+            batch = await OrganizationDAO.get_batch(db, geo_queries)
+            return [[OrganizationDTO.model_validate(org) for org in organizations] for organizations in batch]
+        except Exception as e:
+            logger.error(f'Error searching organizations by geo batch of {len(geo_queries)}: {e}')
+            raise
+
+    @staticmethod
+    async def get_nearest_organizations(
+        db: AsyncSession, lat: float, lng: float, k: int
+    ) -> List[OrganizationDistanceDTO]:
+        """Получить k ближайших организаций"""
+        try:
+            nearest = await OrganizationDAO.get_nearest(db, lat, lng, k)
+            return [
+                OrganizationDistanceDTO.model_validate({**org, 'distance_km': distance}) for org, distance in nearest
+            ]
+        except Exception as e:
+            logger.error(f'Error getting {k} nearest organizations to ({lat}, {lng}): {e}')
+            raise
+
     @staticmethod
     async def get_organizations_in_rectangle(
-        db: AsyncSession, min_lat: float, max_lat: float, min_lng: float, max_lng: float
-    ) -> List[OrganizationDTO]:
-        """Получить организации в прямоугольной области"""
+        db: AsyncSession,
+        min_lat: float,
+        max_lat: float,
+        min_lng: float,
+        max_lng: float,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[FieldSet] = None,
+    ) -> Tuple[OrganizationList, Optional[str]]:
+        """Получить организации в прямоугольной области, по возрастанию расстояния до точки (lat, lng)"""
         try:
-            organizations = await OrganizationDAO.get_in_rectangle(db, min_lat, max_lat, min_lng, max_lng)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            after = decode_cursor(cursor, (float, int)) if cursor else None
+            rows = await OrganizationDAO.get_in_rectangle(
+                db,
+                min_lat,
+                max_lat,
+                min_lng,
+                max_lng,
+                lat,
+                lng,
+                limit=limit + 1 if limit else None,
+                after=after,
+                fields=fields,
+                as_json=settings.ORGANIZATION_JSON_AGG,
+            )
+            return OrganizationService._distance_page(rows, limit, fields, settings.ORGANIZATION_JSON_AGG)
         except Exception as e:
             logger.error(f'Error getting organizations in rectangle: {e}')
             raise
 
+    @staticmethod
+    def _distance_page(
+        rows: List[Tuple[dict, float]], limit: Optional[int], fields: Optional[FieldSet] = None, as_json: bool = False
+    ) -> Tuple[OrganizationList, Optional[str]]:
+        """Страница из limit + 1 строк: лишняя строка означает, что есть следующая страница"""
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last_organization, last_distance = rows[-1]
+            next_cursor = encode_cursor(last_distance, last_organization['id'])
+
+        return OrganizationService._organizations([org for org, _ in rows], fields, as_json), next_cursor
+
+    @staticmethod
+    def _organizations(
+        organizations: List[dict], fields: Optional[FieldSet] = None, as_json: bool = False
+    ) -> OrganizationList:
+        """Ответ из документов DAO: JSON-массив, если документы собрал PostgreSQL (as_json), иначе DTO или словари"""
+        if as_json:
+            return json_array(org[JSON_KEY] for org in organizations)
+        return [shape(OrganizationDTO, org, fields) for org in organizations]
+
+    @staticmethod
+    def _id_page(
+        organizations: List[dict], limit: Optional[int], fields: Optional[FieldSet] = None
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
+        """Страница из limit + 1 организаций по возрастанию ID и after_id следующей страницы"""
+        page, next_after_id = split_page(organizations, limit)
+        return [shape(OrganizationDTO, org, fields) for org in page], next_after_id
+
+    @staticmethod
+    async def export_organizations(db: AsyncSession) -> AsyncIterator[bytes]:
+        """Выгрузка всех организаций в NDJSON: по одной порции строк на каждые EXPORT_CHUNK_SIZE записей"""
+        try:
+            async for chunk in OrganizationDAO.stream_all(db, EXPORT_CHUNK_SIZE):
+                yield b''.join(OrganizationDTO.model_validate(org).model_dump_json().encode() + b'\n' for org in chunk)
+        except Exception as e:
+            logger.error(f'Error exporting organizations: {e}')
+            raise
+
     @staticmethod
     async def create_organization(db: AsyncSession, organization_data: Dict[str, Any]) -> OrganizationDTO:
         """Создать новую организацию"""
@@ -107,6 +313,16 @@ class OrganizationService:
             logger.error(f'Error creating organization: {e}')
             raise
 
+    @staticmethod
+    async def create_organizations(db: AsyncSession, organizations_data: List[Dict[str, Any]]) -> List[OrganizationDTO]:
+        """Создать организации пакетом: все записи в одной транзакции"""
+        try:
+            organizations = await OrganizationDAO.create_many(db, organizations_data)
+            return [OrganizationDTO.model_validate(org) for org in organizations]
+        except Exception as e:
+            logger.error(f'Error creating {len(organizations_data)} organizations: {e}')
+            raise
+
     @staticmethod
     async def update_organization(
         db: AsyncSession, organization_id: int, update_data: Dict[str, Any]
@@ -131,11 +347,13 @@ class OrganizationService:
             raise
 
     @staticmethod
-    async def get_all_organizations(db: AsyncSession) -> List[OrganizationDTO]:
-        """Получить все организации"""
+    async def get_all_organizations(
+        db: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None, fields: Optional[FieldSet] = None
+    ) -> Tuple[List[Union[OrganizationDTO, Dict[str, Any]]], Optional[int]]:
+        """Получить организации по возрастанию ID; вторым значением — after_id следующей страницы"""
         try:
-            organizations = await OrganizationDAO.get_all(db)
-            return [OrganizationDTO.model_validate(org) for org in organizations]
+            organizations = await OrganizationDAO.get_all(db, limit + 1 if limit else None, after_id, fields)
+            return OrganizationService._id_page(organizations, limit, fields)
         except Exception as e:
             logger.error(f'Error getting all organizations: {e}')
             raise
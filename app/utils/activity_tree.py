@@ -0,0 +1,131 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+
+
+class ActivityTreeIndex:
+    """
+    Дерево видов деятельности в памяти процесса.
+
+    Хранит смежность (родитель/дети) и заранее посчитанные множества потомков,
+    чтобы запросы по поддеревьям и корням не обращались к базе.
+    Загружается при старте приложения и обновляется при записи через ActivityDAO.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._names: Dict[int, str] = {}
+        self._parents: Dict[int, Optional[int]] = {}
+        self._children: Dict[int, List[int]] = {}
+        self._descendants: Dict[int, Set[int]] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить дерево одним запросом"""
+        result = await db.execute(select(Activity.id, Activity.name, Activity.parent_id))
+        self._names = {}
+        self._parents = {}
+        for activity_id, name, parent_id in result:
+            self._names[activity_id] = name
+            self._parents[activity_id] = parent_id
+
+        self._rebuild()
+        self.loaded = True
+
+    def add(self, activity_id: int, name: str, parent_id: Optional[int]) -> None:
+        if not self.loaded:
+            return
+        self._names[activity_id] = name
+        self._parents[activity_id] = parent_id
+        self._rebuild()
+
+    def update(self, activity_id: int, name: str, parent_id: Optional[int]) -> None:
+        self.add(activity_id, name, parent_id)
+
+    def remove(self, activity_id: int) -> None:
+        """Удалить вид деятельности вместе с поддеревом (как каскад в модели)"""
+        if not self.loaded or activity_id not in self._names:
+            return
+        for descendant_id in self._descendants[activity_id]:
+            self._names.pop(descendant_id, None)
+            self._parents.pop(descendant_id, None)
+        self._rebuild()
+
+    def root_ids(self) -> List[int]:
+        return sorted(activity_id for activity_id, parent_id in self._parents.items() if parent_id is None)
+
+    def subtree_ids(self, activity_id: int) -> Set[int]:
+        """ID вида деятельности и всех его потомков"""
+        return self._descendants.get(activity_id, set())
+
+    def descendant_ids(self, activity_id: int, max_depth: Optional[int] = None) -> List[int]:
+        """ID потомков в порядке обхода в ширину (по уровню, затем по ID)"""
+        if activity_id not in self._names:
+            return []
+
+        result = []
+        queue = deque((child_id, 1) for child_id in self._children[activity_id])
+        while queue:
+            current_id, depth = queue.popleft()
+            if max_depth is not None and depth > max_depth:
+                break
+            result.append(current_id)
+            queue.extend((child_id, depth + 1) for child_id in self._children[current_id])
+        return result
+
+    def ancestor_ids(self, activity_id: int) -> List[int]:
+        """ID предков, начиная с корня"""
+        result = []
+        parent_id = self._parents.get(activity_id)
+        while parent_id is not None and parent_id not in result:
+            result.append(parent_id)
+            parent_id = self._parents.get(parent_id)
+        return result[::-1]
+
+    def rows(self) -> List[Tuple[int, str, Optional[int]]]:
+        """Плоский список (id, name, parent_id), как из таблицы activity"""
+        return [
+            (activity_id, self._names[activity_id], self._parents[activity_id]) for activity_id in sorted(self._names)
+        ]
+
+    def node(self, activity_id: int) -> Dict[str, Any]:
+        """Вид деятельности в форме ActivityDTO: с детьми и родителем первого уровня"""
+        parent_id = self._parents[activity_id]
+        return {
+            **self._simple(activity_id),
+            'children': [self._simple(child_id) for child_id in self._children[activity_id]],
+            'parent': self._simple(parent_id) if parent_id in self._names else None,
+        }
+
+    def _simple(self, activity_id: int) -> Dict[str, Any]:
+        return {'id': activity_id, 'name': self._names[activity_id], 'parent_id': self._parents[activity_id]}
+
+    def _rebuild(self) -> None:
+        children: Dict[int, List[int]] = {activity_id: [] for activity_id in self._names}
+        for activity_id, parent_id in self._parents.items():
+            if parent_id in children:
+                children[parent_id].append(activity_id)
+        for child_ids in children.values():
+            child_ids.sort()
+
+        # Обход от корней в ширину, затем множества потомков снизу вверх
+        order = []
+        queue = deque(activity_id for activity_id, parent_id in self._parents.items() if parent_id not in children)
+        while queue:
+            current_id = queue.popleft()
+            order.append(current_id)
+            queue.extend(children[current_id])
+
+        descendants: Dict[int, Set[int]] = {activity_id: {activity_id} for activity_id in self._names}
+        for activity_id in reversed(order):
+            for child_id in children[activity_id]:
+                descendants[activity_id] |= descendants[child_id]
+
+        self._children = children
+        self._descendants = descendants
+
+
+activity_tree = ActivityTreeIndex()
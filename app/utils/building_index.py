@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.building import Building
+from app.utils.geo import haversine_km, radius_bboxes
+
+# Узел KD-дерева: ((latitude, longitude, id), ось, левое поддерево, правое поддерево)
+KDNode = Tuple[Tuple[float, float, int], int, Optional['KDNode'], Optional['KDNode']]
+
+
+class BuildingSpatialIndex:
+    """
+    KD-дерево зданий по (широта, долгота) в памяти процесса.
+
+    Отвечает на поиск в прямоугольнике и в радиусе без обращения к базе.
+    Включается настройкой BUILDING_SPATIAL_INDEX; изменения через BuildingDAO
+    попадают в индекс сразу, а дерево перестраивается при следующем запросе.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._buildings: Dict[int, Tuple[str, float, float]] = {}
+        self._root: Optional[KDNode] = None
+        self._dirty = False
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить все здания одним запросом"""
+        result = await db.execute(select(Building.id, Building.address, Building.latitude, Building.longitude))
+        self._buildings = {building_id: (address, lat, lng) for building_id, address, lat, lng in result}
+        self._dirty = True
+        self.loaded = True
+
+    def add(self, building_id: int, address: str, lat: float, lng: float) -> None:
+        if not self.loaded:
+            return
+        self._buildings[building_id] = (address, lat, lng)
+        self._dirty = True
+
+    def update(self, building_id: int, address: str, lat: float, lng: float) -> None:
+        self.add(building_id, address, lat, lng)
+
+    def remove(self, building_id: int) -> None:
+        if not self.loaded:
+            return
+        self._buildings.pop(building_id, None)
+        self._dirty = True
+
+    def in_rectangle(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> List[Dict[str, Any]]:
+        return [self._as_dict(building_id) for building_id in self._search(min_lat, max_lat, min_lng, max_lng)]
+
+    def in_radius(self, lat: float, lng: float, radius_km: float) -> List[Dict[str, Any]]:
+        result = []
+        for bbox in radius_bboxes(lat, lng, radius_km):
+            for building_id in self._search(*bbox):
+                _, b_lat, b_lng = self._buildings[building_id]
+                if haversine_km(lat, lng, b_lat, b_lng) <= radius_km:
+                    result.append(self._as_dict(building_id))
+        return result
+
+    def _as_dict(self, building_id: int) -> Dict[str, Any]:
+        address, lat, lng = self._buildings[building_id]
+        return {'id': building_id, 'address': address, 'latitude': lat, 'longitude': lng}
+
+    def _search(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> List[int]:
+        if self._dirty:
+            points = [(lat, lng, building_id) for building_id, (_, lat, lng) in self._buildings.items()]
+            self._root = self._build(points, 0)
+            self._dirty = False
+
+        lows, highs = (min_lat, min_lng), (max_lat, max_lng)
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, axis, left, right = node
+            if min_lat <= point[0] <= max_lat and min_lng <= point[1] <= max_lng:
+                found.append(point[2])
+            if lows[axis] <= point[axis]:
+                stack.append(left)
+            if point[axis] <= highs[axis]:
+                stack.append(right)
+        return sorted(found)
+
+    @classmethod
+    def _build(cls, points: List[Tuple[float, float, int]], depth: int) -> Optional[KDNode]:
+        if not points:
+            return None
+        axis = depth % 2
+        points.sort(key=lambda point: point[axis])
+        middle = len(points) // 2
+        return (
+            points[middle],
+            axis,
+            cls._build(points[:middle], depth + 1),
+            cls._build(points[middle + 1 :], depth + 1),
+        )
+
+
+building_index = BuildingSpatialIndex()
@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import ColumnElement, RowMapping, Select, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Разделитель в метках столбцов вложенного объекта: building__address -> {'building': {'address': ...}}
+NESTED_SEPARATOR = '__'
+
+# Метка столбца с ID документа-владельца в запросах коллекций
+OWNER_KEY = '_owner_id'
+
+
+def nested_columns(name: str, columns: Sequence[Any]) -> List[Any]:
+    """Столбцы вложенного объекта name с метками для row_document"""
+    return [column.label(f'{name}{NESTED_SEPARATOR}{column.key}') for column in columns]
+
+
+def row_document(row: RowMapping) -> Dict[str, Any]:
+    """
+    Словарь документа из строки Core-запроса без создания ORM-объектов.
+
+    Столбцы из nested_columns собираются во вложенные словари; вложенный объект,
+    все поля которого NULL (внешнее соединение без пары), становится None.
+    """
+    document: Dict[str, Any] = {}
+    for key, value in row.items():
+        name, separator, field = key.partition(NESTED_SEPARATOR)
+        if separator:
+            document.setdefault(name, {})[field] = value
+        else:
+            document[key] = value
+    for name, value in document.items():
+        if isinstance(value, dict) and all(item is None for item in value.values()):
+            document[name] = None
+    return document
+
+
+async def attach_collection(
+    db: AsyncSession, documents: List[Dict[str, Any]], name: str, query: Select, owner_id: ColumnElement
+) -> None:
+    """
+    Дочитать коллекцию name для документов одним запросом.
+
+    query выбирает столбцы элементов коллекции, owner_id - столбец с ID документа-владельца.
+    """
+    items: Dict[int, List[Dict[str, Any]]] = {}
+    ids = {document['id'] for document in documents}
+    if ids:
+        result = await db.execute(query.add_columns(owner_id.label(OWNER_KEY)).where(owner_id.in_(ids)))
+        for row in result.mappings():
+            item = dict(row)
+            items.setdefault(item.pop(OWNER_KEY), []).append(item)
+
+    # Один и тот же документ может встретиться несколько раз (пакетный геопоиск)
+    for document in documents:
+        document[name] = items.get(document['id'], [])
+
+
+def json_object(entity: Any, fields: Sequence[str]) -> ColumnElement:
+    """json_build_object из столбцов entity с ключами - именами полей (для сборки JSON в PostgreSQL)"""
+    return func.json_build_object(
+        *(item for name in fields for item in (literal_column(f"'{name}'"), getattr(entity, name)))
+    )
+
+
+def json_collection(query: Select) -> ColumnElement:
+    """Коррелированный подзапрос с json_agg: пустой массив вместо NULL, если строк нет"""
+    return func.coalesce(query.scalar_subquery(), literal_column("'[]'::json"))
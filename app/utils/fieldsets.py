@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args
+
+from pydantic import BaseModel
+
+# Запрошенные поля ответа: имя поля -> None для простого поля,
+# либо кортеж запрошенных полей вложенного объекта (связи)
+FieldSet = Dict[str, Optional[Tuple[str, ...]]]
+
+
+def fieldset_schema(dto: type) -> FieldSet:
+    """Допустимые поля DTO: вложенные DTO (в том числе списки) раскрываются в кортеж своих полей"""
+    schema: FieldSet = {}
+    for name, field in dto.model_fields.items():
+        nested = [arg for arg in _flatten(field.annotation) if isinstance(arg, type) and issubclass(arg, BaseModel)]
+        schema[name] = tuple(nested[0].model_fields) if nested else None
+    return schema
+
+
+def _flatten(annotation: Any) -> List[Any]:
+    args = get_args(annotation)
+    if not args:
+        return [annotation]
+    return [item for arg in args for item in _flatten(arg)]
+
+
+def parse_fields(fields: Optional[str], schema: FieldSet) -> Optional[FieldSet]:
+    """
+    Разобрать параметр fields=id,name,building.address по схеме из fieldset_schema.
+
+    "building" означает все поля связи, "building.address" - только указанные.
+    None, если параметр не передан; ValueError для неизвестных полей.
+    """
+    if fields is None:
+        return None
+
+    requested: Dict[str, Union[None, set]] = {}
+    for item in filter(None, (item.strip() for item in fields.split(','))):
+        name, _, subfield = item.partition('.')
+        if name not in schema or (subfield and (schema[name] is None or subfield not in schema[name])):
+            raise ValueError(f'Unknown field: {item}')
+        if schema[name] is None:
+            requested[name] = None
+        else:
+            requested.setdefault(name, set()).update([subfield] if subfield else schema[name])
+
+    if not requested:
+        raise ValueError('At least one field must be requested')
+    # Порядок полей - как в DTO
+    return {
+        name: None if requested[name] is None else tuple(sub for sub in schema[name] if sub in requested[name])
+        for name in schema
+        if name in requested
+    }
+
+
+def project(item: Any, fieldset: FieldSet) -> Dict[str, Any]:
+    """Словарь только с запрошенными полями ORM-объекта или словаря"""
+    result = {}
+    for name, subfields in fieldset.items():
+        value = _get(item, name)
+        if subfields is None or value is None:
+            result[name] = value
+        elif isinstance(value, (list, tuple)):
+            result[name] = [{sub: _get(element, sub) for sub in subfields} for element in value]
+        else:
+            result[name] = {sub: _get(value, sub) for sub in subfields}
+    return result
+
+
+def shape(dto: type, item: Any, fieldset: Optional[FieldSet]) -> Any:
+    """DTO целиком, если поля не запрошены, иначе словарь только с запрошенными полями"""
+    return dto.model_validate(item) if fieldset is None else project(item, fieldset)
+
+
+def response_type(dto_type: Any, fieldset: Optional[FieldSet]) -> Any:
+    """Тип для json_response: DTO целиком, либо словари только с запрошенными полями"""
+    return dto_type if fieldset is None else Any
+
+
+def _get(item: Any, name: str) -> Any:
+    return item[name] if isinstance(item, dict) else getattr(item, name)
@@ -0,0 +1,123 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+# Число бит на координату в ячейке сетки (Z-order / целочисленный geohash).
+# 2 * 26 = 52 бита, помещается в BIGINT; размер ячейки на экваторе порядка 0.5 м.
+CELL_BITS = 26
+CELL_MAX = (1 << CELL_BITS) - 1
+
+# Сколько ячеек одного уровня допускается при покрытии области перед фильтрацией
+MAX_COVER_CELLS = 32
+
+EARTH_RADIUS_KM = 6371.0
+HALF_EARTH_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def _spread(value: int) -> int:
+    """Разнести биты числа через один: abc -> 0a0b0c"""
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _lat_index(lat: float) -> int:
+    return min(max(int((lat + 90.0) / 180.0 * (1 << CELL_BITS)), 0), CELL_MAX)
+
+
+def _lng_index(lng: float) -> int:
+    return min(max(int((lng + 180.0) / 360.0 * (1 << CELL_BITS)), 0), CELL_MAX)
+
+
+def _interleave(lat_index: int, lng_index: int) -> int:
+    # Как в geohash: первым идёт бит долготы
+    return (_spread(lng_index) << 1) | _spread(lat_index)
+
+
+def encode_cell(lat: float, lng: float) -> int:
+    """Ячейка сетки для точки; общий двоичный префикс означает вложенность ячеек"""
+    return _interleave(_lat_index(lat), _lng_index(lng))
+
+
+def cell_ranges(min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> List[Tuple[int, int]]:
+    """
+    Покрыть прямоугольник диапазонами ячеек [start, end).
+
+    Выбирается самый мелкий уровень сетки, на котором область покрывается
+    не более чем MAX_COVER_CELLS ячейками; соседние диапазоны склеиваются.
+    """
+    lat_lo, lat_hi = _lat_index(max(min_lat, -90.0)), _lat_index(min(max_lat, 90.0))
+    lng_lo, lng_hi = _lng_index(max(min_lng, -180.0)), _lng_index(min(max_lng, 180.0))
+
+    for level in range(CELL_BITS, -1, -1):
+        shift = CELL_BITS - level
+        lat_cells = range(lat_lo >> shift, (lat_hi >> shift) + 1)
+        lng_cells = range(lng_lo >> shift, (lng_hi >> shift) + 1)
+        if len(lat_cells) * len(lng_cells) <= MAX_COVER_CELLS:
+            break
+
+    prefixes = sorted(_interleave(i, j) for i in lat_cells for j in lng_cells)
+    ranges: List[Tuple[int, int]] = []
+    for prefix in prefixes:
+        start, end = prefix << (2 * shift), (prefix + 1) << (2 * shift)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def radius_bboxes(lat: float, lng: float, radius_km: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Прямоугольники (min_lat, max_lat, min_lng, max_lng), покрывающие круг.
+
+    Круг, пересекающий антимеридиан, покрывается двумя прямоугольниками по обе стороны от ±180;
+    если круг захватывает полюс, берётся весь диапазон долгот.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_diff = math.degrees(angle)
+    min_lat, max_lat = lat - lat_diff, lat + lat_diff
+    if min_lat <= -90.0 or max_lat >= 90.0 or math.sin(angle) >= math.cos(math.radians(lat)):
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    # Наибольшее отклонение по долготе у круга на сфере - в точках касания меридианов
+    lng_diff = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lng, max_lng = lng - lng_diff, lng + lng_diff
+    if min_lng < -180.0:
+        return [(min_lat, max_lat, min_lng + 360.0, 180.0), (min_lat, max_lat, -180.0, max_lng)]
+    if max_lng > 180.0:
+        return [(min_lat, max_lat, min_lng, 180.0), (min_lat, max_lat, -180.0, max_lng - 360.0)]
+    return [(min_lat, max_lat, min_lng, max_lng)]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по дуге большого круга в километрах"""
+    lat1_rad = math.radians(lat1)
+    lon1_rad = math.radians(lon1)
+    lat2_rad = math.radians(lat2)
+    lon2_rad = math.radians(lon2)
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_many(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Расстояния в километрах от точки до массива точек, одним векторным вычислением"""
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(lats)
+
+    dlat = lats_rad - lat_rad
+    dlon = np.radians(lngs) - math.radians(lng)
+
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
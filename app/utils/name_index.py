@@ -0,0 +1,92 @@
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.organization import Organization
+
+# Длина n-граммы; для запросов короче этого названия просматриваются целиком
+GRAM_SIZE = 3
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _similarity(name: str, term: str) -> float:
+    """Доля общих триграмм (как similarity() в pg_trgm, по строкам с отступами)"""
+    name_grams, term_grams = _grams(f'  {name} '), _grams(f'  {term} ')
+    return len(name_grams & term_grams) / len(name_grams | term_grams)
+
+
+class OrganizationNameIndex:
+    """
+    Инвертированный индекс триграмм названий организаций в памяти процесса.
+
+    Поиск по подстроке пересекает списки ID для триграмм запроса и проверяет
+    кандидатов, так что результат совпадает с ILIKE '%term%'.
+    Включается настройкой ORGANIZATION_NAME_INDEX; изменения через OrganizationDAO
+    попадают в индекс сразу.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._names: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить названия всех организаций одним запросом"""
+        result = await db.execute(select(Organization.id, Organization.name))
+        self._names = {}
+        self._postings = {}
+        self.loaded = True
+        for organization_id, name in result:
+            self.add(organization_id, name)
+
+    def add(self, organization_id: int, name: str) -> None:
+        if not self.loaded:
+            return
+        self.remove(organization_id)
+        name = name.lower()
+        self._names[organization_id] = name
+        for gram in _grams(name):
+            self._postings.setdefault(gram, set()).add(organization_id)
+
+    def update(self, organization_id: int, name: str) -> None:
+        self.add(organization_id, name)
+
+    def remove(self, organization_id: int) -> None:
+        if not self.loaded:
+            return
+        name = self._names.pop(organization_id, None)
+        if name is None:
+            return
+        for gram in _grams(name):
+            posting = self._postings[gram]
+            posting.discard(organization_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, term: str, limit: Optional[int] = None, rank: bool = False) -> List[int]:
+        """ID организаций, в названии которых есть term (без учёта регистра)"""
+        term = term.lower()
+        grams = _grams(term)
+        if grams:
+            # Пересечение начинается с самого короткого списка
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = self._names.keys()
+
+        found = sorted(organization_id for organization_id in candidates if term in self._names[organization_id])
+        if rank:
+            found.sort(
+                key=lambda organization_id: (
+                    -_similarity(self._names[organization_id], term),
+                    self._names[organization_id],
+                )
+            )
+        return found[:limit] if limit is not None else found
+
+
+organization_name_index = OrganizationNameIndex()
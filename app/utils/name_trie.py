@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+from app.models.organization import Organization
+
+
+class _TrieNode:
+    __slots__ = ('label', 'children', 'entries')
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.children: Dict[str, '_TrieNode'] = {}
+        # ID -> исходное название для названий, которые заканчиваются в этом узле
+        self.entries: Dict[int, str] = {}
+
+
+class NameTrie:
+    """
+    Сжатое префиксное дерево (radix trie) названий в памяти процесса.
+
+    Рёбра хранят подстроки, а не отдельные символы; ключ - название в нижнем
+    регистре. Дополнения возвращаются в алфавитном порядке без обращения к базе.
+    Загружается при старте приложения и обновляется при записи через DAO.
+    """
+
+    def __init__(self, model: Any) -> None:
+        self.model = model
+        self.loaded = False
+        self._root = _TrieNode('')
+        self._keys: Dict[int, str] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить все названия одним запросом"""
+        result = await db.execute(select(self.model.id, self.model.name))
+        self._root = _TrieNode('')
+        self._keys = {}
+        self.loaded = True
+        for item_id, name in result:
+            self.add(item_id, name)
+
+    def add(self, item_id: int, name: str) -> None:
+        if not self.loaded:
+            return
+        self.remove(item_id)
+        key = name.lower()
+        self._keys[item_id] = key
+
+        node, rest = self._root, key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _TrieNode(rest)
+                rest = ''
+            else:
+                common = self._common_length(child.label, rest)
+                if common < len(child.label):
+                    # Разбить ребро: общая часть становится промежуточным узлом
+                    middle = _TrieNode(child.label[:common])
+                    child.label = child.label[common:]
+                    middle.children[child.label[0]] = child
+                    node.children[rest[0]] = middle
+                    child = middle
+                rest = rest[common:]
+            node = child
+        node.entries[item_id] = name
+
+    def update(self, item_id: int, name: str) -> None:
+        self.add(item_id, name)
+
+    def remove(self, item_id: int) -> None:
+        if not self.loaded:
+            return
+        key = self._keys.pop(item_id, None)
+        if key is None:
+            return
+
+        path = [self._root]
+        rest = key
+        while rest:
+            child = path[-1].children[rest[0]]
+            path.append(child)
+            rest = rest[len(child.label) :]
+        path[-1].entries.pop(item_id, None)
+
+        # Убрать опустевшие листья и склеить узлы с единственным ребёнком
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if not node.entries and not node.children:
+                del parent.children[node.label[0]]
+            elif not node.entries and len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """(id, название) для названий, начинающихся с prefix, по алфавиту"""
+        node, rest = self._root, prefix.lower()
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return []
+            if child.label.startswith(rest):
+                rest = ''
+            elif rest.startswith(child.label):
+                rest = rest[len(child.label) :]
+            else:
+                return []
+            node = child
+
+        result: List[Tuple[int, str]] = []
+        stack = [node]
+        while stack and (limit is None or len(result) < limit):
+            current = stack.pop()
+            result.extend(sorted(current.entries.items(), key=lambda entry: (entry[1], entry[0])))
+            stack.extend(current.children[char] for char in sorted(current.children, reverse=True))
+        return result[:limit] if limit is not None else result
+
+    @staticmethod
+    def _common_length(first: str, second: str) -> int:
+        length = 0
+        for a, b in zip(first, second):
+            if a != b:
+                break
+            length += 1
+        return length
+
+
+organization_trie = NameTrie(Organization)
+activity_trie = NameTrie(Activity)
@@ -0,0 +1,71 @@
+import base64
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select
+from starlette.datastructures import URL
+
+# Размер страницы списков по умолчанию и наибольший допустимый
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values: Any) -> str:
+    """Непрозрачный курсор страницы из значений ключа последней записи"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Разобрать курсор из encode_cursor со значениями типов types, например (float, int).
+
+    ValueError, если курсор повреждён: значения попадают в запрос как ключ страницы.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    if not all(_is_cursor_value(value, value_type) for value, value_type in zip(values, types)):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return values
+
+
+def _is_cursor_value(value: Any, value_type: type) -> bool:
+    if isinstance(value, bool):
+        return False
+    if value_type is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    return isinstance(value, value_type)
+
+
+def keyset_page(query: Select, id_column: Any, limit: Optional[int] = None, after_id: Optional[int] = None) -> Select:
+    """Страница по возрастанию ID: записи с ID больше after_id, не больше limit"""
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def split_page(items: Sequence[Any], limit: Optional[int]) -> Tuple[List[Any], Optional[int]]:
+    """
+    Отрезать страницу от выборки документов (словарей) размером limit + 1.
+
+    Вторым значением возвращается after_id следующей страницы, если она есть.
+    """
+    if limit is None or len(items) <= limit:
+        return list(items), None
+    page = list(items[:limit])
+    return page, page[-1]['id']
+
+
+def page_headers(url: URL, next_after_id: Optional[int]) -> Dict[str, str]:
+    """Заголовок Link со ссылкой на следующую страницу, если она есть"""
+    if next_after_id is None:
+        return {}
+    return {'Link': f'<{url.include_query_params(after_id=next_after_id)}>; rel="next"'}
@@ -0,0 +1,9 @@
+import re
+
+# Только ASCII-цифры, как в regexp_replace миграции: \D пропустил бы цифры других алфавитов
+_NON_DIGITS = re.compile(r'[^0-9]')
+
+
+def normalize_phone(phone_number: str) -> str:
+    """Оставить в номере только цифры: '8-923-666-13-13' -> '89236661313'"""
+    return _NON_DIGITS.sub('', phone_number)
@@ -0,0 +1,14 @@
+from sqlalchemy import Select, func
+
+
+def name_search(query: Select, column, term: str, rank: bool = False) -> Select:
+    """
+    Поиск подстроки без учёта регистра.
+
+    ILIKE '%term%' обслуживается GIN-индексом pg_trgm по столбцу; при rank=True
+    результаты упорядочиваются по триграммной похожести на term.
+    """
+    query = query.where(column.ilike(f'%{term}%'))
+    if rank:
+        query = query.order_by(func.similarity(column, term).desc(), column)
+    return query
@@ -0,0 +1,36 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+class RawJSON(bytes):
+    """Готовый JSON (например, собранный PostgreSQL): json_response отдаёт его без сериализации"""
+
+
+def json_array(items: Iterable[str]) -> RawJSON:
+    """JSON-массив из готовых JSON-текстов элементов"""
+    return RawJSON(b'[' + ','.join(items).encode() + b']')
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def json_response(
+    response_type: Any, data: Any, status_code: int = status.HTTP_200_OK, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON-ответ из уже проверенных DTO: сериализация в байты за один проход pydantic-core.
+
+    Готовый Response FastAPI отдаёт как есть, без повторной проверки по response_model;
+    response_model в декораторе остаётся для схемы OpenAPI. RawJSON передаётся без изменений.
+    """
+    return Response(
+        content=data if isinstance(data, RawJSON) else _adapter(response_type).dump_json(data),
+        media_type='application/json',
+        status_code=status_code,
+        headers=headers,
+    )
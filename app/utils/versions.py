@@ -0,0 +1,44 @@
+from typing import Callable, Dict, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models.table_version import TableVersion
+
+
+async def get_etag(db: AsyncSession, versions: Sequence[str]) -> str:
+    """Сильный ETag для данных с версиями versions (app/models/table_version.py): одно чтение по первичному ключу"""
+    result = await db.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(versions))
+    )
+    current = dict(result.all())
+    # Версии ещё нет, если в таблицы не писали с момента установки триггеров
+    return '"' + '-'.join(str(current.get(version, 0)) for version in versions) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с одним из перечисленных в If-None-Match (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    return etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+
+
+def conditional(*versions: str) -> Callable[..., Dict[str, str]]:
+    """
+    Зависимость для GET-обработчика, читающего данные с версиями versions.
+
+    ETag читается из базы до основных запросов, поэтому запись во время чтения даст
+    лишний ответ 200, но не устаревший 304. При совпадении If-None-Match
+    отвечает 304 без вызова обработчика; иначе возвращает заголовки ETag для ответа.
+    """
+
+    async def dependency(request: Request, db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
+        etag = await get_etag(db, versions)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return headers
+
+    return dependency
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List, Optional
+import json
 import logging
 
 from app.database import get_db
-from app.dto.activity import ActivityDTO, ActivityCreateDTO
+from app.dto.activity import ActivityDTO, ActivityCreateDTO, ActivityNameDTO, ActivityTreeDTO
 from app.services.activity import ActivityService
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_headers
+from app.utils.serialization import json_response
+from app.utils.versions import conditional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/activities', tags=['activities'])
 
+# ETag GET-ответов по версии таблицы видов деятельности (app/utils/versions.py)
+conditional_get = conditional('activity')
+
 
 @router.post(
     '/', response_model=ActivityDTO, status_code=status.HTTP_201_CREATED, summary='Создать новый вид деятельности'
@@ -31,8 +38,50 @@ async def create_activity(activity_data: ActivityCreateDTO, db: AsyncSession = D
         )
 
 
+@router.get('/tree', response_model=List[ActivityTreeDTO], summary='Получить всё дерево видов деятельности')
+async def get_activity_tree(
+    etag_headers: Dict[str, str] = Depends(conditional_get), db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Получить всю иерархию видов деятельности вложенным JSON за один запрос.
+
+    Ответ содержит ETag; при совпадении заголовка If-None-Match возвращается 304 без построения дерева.
+    """
+    try:
+        tree = await ActivityService.get_activity_tree(db)
+        body = json.dumps(tree, ensure_ascii=False, separators=(',', ':')).encode()
+        return Response(content=body, media_type='application/json', headers=etag_headers)
+    except Exception as e:
+        logger.error(f'Error getting activity tree: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error getting activities: {str(e)}'
+        )
+
+
+@router.get('/autocomplete', response_model=List[ActivityNameDTO], summary='Автодополнение названий видов деятельности')
+async def autocomplete_activities(
+    q: str = Query(..., min_length=1, description='Начало названия вида деятельности'),
+    limit: int = Query(10, ge=1, le=50, description='Максимальное число подсказок'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Подсказки для строки поиска: ID и названия видов деятельности, начинающиеся с q, по алфавиту.
+    """
+    try:
+        completions = await ActivityService.autocomplete_activities(db, q, limit)
+        return json_response(List[ActivityNameDTO], completions, headers=etag_headers)
+    except Exception as e:
+        logger.error(f'Error autocompleting activities by prefix {q}: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error autocompleting activities: {str(e)}'
+        )
+
+
 @router.get('/{activity_id}', response_model=ActivityDTO, summary='Получить вид деятельности по ID')
-async def get_activity(activity_id: int, db: AsyncSession = Depends(get_db)) -> ActivityDTO:
+async def get_activity(
+    activity_id: int, etag_headers: Dict[str, str] = Depends(conditional_get), db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Получить информацию о виде деятельности по ID.
     """
@@ -42,7 +91,7 @@ async def get_activity(activity_id: int, db: AsyncSession = Depends(get_db)) ->
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=f'Activity with id {activity_id} not found'
             )
-        return ActivityDTO(**activity)
+        return json_response(ActivityDTO, activity, headers=etag_headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -53,13 +102,15 @@ async def get_activity(activity_id: int, db: AsyncSession = Depends(get_db)) ->
 
 
 @router.get('/roots/root', response_model=List[ActivityDTO], summary='Получить корневые виды деятельности')
-async def get_root_activities(db: AsyncSession = Depends(get_db)) -> List[ActivityDTO]:
+async def get_root_activities(
+    etag_headers: Dict[str, str] = Depends(conditional_get), db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Получить корневые виды деятельности.
     """
     try:
         activities = await ActivityService.get_root_activities(db)
-        return [ActivityDTO(**act) for act in activities]
+        return json_response(List[ActivityDTO], activities, headers=etag_headers)
     except Exception as e:
         logger.error(f'Error getting root activities: {e}')
         raise HTTPException(
@@ -70,16 +121,17 @@ async def get_root_activities(db: AsyncSession = Depends(get_db)) -> List[Activi
 @router.get('/{activity_id}/children', response_model=List[ActivityDTO], summary='Получить дочерние виды деятельности')
 async def get_children_activities(
     activity_id: int,
-    max_depth: int = Query(3, ge=1, le=3, description='Максимальная глубина вложенности (1-3)'),
+    max_depth: Optional[int] = Query(None, ge=1, description='Максимальная глубина вложенности (без ограничения)'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
     db: AsyncSession = Depends(get_db),
-) -> List[ActivityDTO]:
+) -> Response:
     """
     Получить дочерние виды деятельности с ограничением глубины вложенности.
-    По умолчанию глубина ограничена 3 уровнями.
+    По умолчанию возвращаются потомки всех уровней.
     """
     try:
         activities = await ActivityService.get_children_activities(db, activity_id, max_depth)
-        return activities
+        return json_response(List[ActivityDTO], activities, headers=etag_headers)
     except Exception as e:
         logger.error(f'Error getting children activities for {activity_id}: {e}')
         raise HTTPException(
@@ -87,16 +139,49 @@ async def get_children_activities(
         )
 
 
+@router.get(
+    '/{activity_id}/ancestors', response_model=List[ActivityDTO], summary='Получить родительские виды деятельности'
+)
+async def get_ancestor_activities(
+    activity_id: int, etag_headers: Dict[str, str] = Depends(conditional_get), db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Получить цепочку родительских видов деятельности от корня до непосредственного родителя.
+    """
+    try:
+        activities = await ActivityService.get_ancestor_activities(db, activity_id)
+        return json_response(List[ActivityDTO], activities, headers=etag_headers)
+    except Exception as e:
+        logger.error(f'Error getting ancestor activities for {activity_id}: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error getting activities: {str(e)}'
+        )
+
+
 @router.get('/search/by-name', response_model=List[ActivityDTO], summary='Поиск видов деятельности по названию')
 async def search_activities_by_name(
-    name: str = Query(..., description='Название вида деятельности для поиска'), db: AsyncSession = Depends(get_db)
-) -> List[ActivityDTO]:
+    request: Request,
+    name: str = Query(..., description='Название вида деятельности для поиска'),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    rank: bool = Query(
+        False, description='Сортировать по похожести названия (pg_trgm); выдача - одна страница из limit записей'
+    ),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
-    Поиск видов деятельности по названию (регистронезависимый поиск).
+    Поиск видов деятельности по названию (регистронезависимый поиск по подстроке).
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
     """
     try:
-        activities = await ActivityService.search_activities_by_name(db, name)
-        return [ActivityDTO(**act) for act in activities]
+        activities, next_after_id = await ActivityService.search_activities_by_name(db, name, limit, rank, after_id)
+        return json_response(
+            List[ActivityDTO], activities, headers={**etag_headers, **page_headers(request.url, next_after_id)}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error searching activities by name {name}: {e}')
         raise HTTPException(
@@ -105,13 +190,23 @@ async def search_activities_by_name(
 
 
 @router.get('/', response_model=List[ActivityDTO], summary='Получить все виды деятельности')
-async def get_all_activities(db: AsyncSession = Depends(get_db)) -> List[ActivityDTO]:
+async def get_all_activities(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Размер страницы'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
-    Получить список всех видов деятельности.
+    Получить список видов деятельности постранично.
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
     """
     try:
-        activities = await ActivityService.get_all_activities(db)
-        return [ActivityDTO(**act) for act in activities]
+        activities, next_after_id = await ActivityService.get_all_activities(db, limit, after_id)
+        return json_response(
+            List[ActivityDTO], activities, headers={**etag_headers, **page_headers(request.url, next_after_id)}
+        )
     except Exception as e:
         logger.error(f'Error getting all activities: {e}')
         raise HTTPException(
@@ -1,15 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List, Optional
 import logging
 
 from app.database import get_db
-from app.dto.building import BuildingDTO, BuildingCreateDTO, BuildingWithOrganizationsDTO, GeoQueryDTO
+from app.dto.building import (
+    BUILDING_FIELDS,
+    GEO_BATCH_MAX_SIZE,
+    BuildingDTO,
+    BuildingCreateDTO,
+    BuildingWithOrganizationsDTO,
+    GeoQueryDTO,
+)
+from app.dto.organization import BUILDING_WITH_ORGANIZATIONS_FIELDS
 from app.services.building import BuildingService
+from app.utils.fieldsets import parse_fields, response_type
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_headers
+from app.utils.serialization import json_response
+from app.utils.versions import conditional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/buildings', tags=['buildings'])
 
+FIELDS_DESCRIPTION = 'Поля ответа через запятую, например id,address,organizations.name'
+
+conditional_get = conditional('building')
+# Здание по id отдаётся вместе с организациями, поэтому его ETag зависит от версий обеих таблиц
+conditional_get_with_organizations = conditional('building', 'organization')
+
 
 @router.post('/', response_model=BuildingDTO, status_code=status.HTTP_201_CREATED, summary='Создать новое здание')
 async def create_building(building_data: BuildingCreateDTO, db: AsyncSession = Depends(get_db)) -> BuildingDTO:
@@ -31,19 +49,29 @@ async def create_building(building_data: BuildingCreateDTO, db: AsyncSession = D
 
 
 @router.get('/{building_id}', response_model=BuildingWithOrganizationsDTO, summary='Получить здание с организациями')
-async def get_building(building_id: int, db: AsyncSession = Depends(get_db)) -> BuildingWithOrganizationsDTO:
+async def get_building(
+    building_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get_with_organizations),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Получить информацию о здании и список организаций в нём.
+
+    В fields можно перечислить нужные поля; без organizations организации не запрашиваются.
     """
     try:
-        building = await BuildingService.get_building_with_organizations(db, building_id)
+        fieldset = parse_fields(fields, BUILDING_WITH_ORGANIZATIONS_FIELDS)
+        building = await BuildingService.get_building_with_organizations(db, building_id, fieldset)
         if not building:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=f'Building with id {building_id} not found'
             )
-        return BuildingWithOrganizationsDTO(**building)
+        return json_response(response_type(BuildingWithOrganizationsDTO, fieldset), building, headers=etag_headers)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting building {building_id}: {e}')
         raise HTTPException(
@@ -52,22 +80,29 @@ async def get_building(building_id: int, db: AsyncSession = Depends(get_db)) ->
 
 
 @router.post('/geo/search', response_model=List[BuildingDTO], summary='Поиск зданий по геолокации')
-async def search_buildings_by_geo(geo_query: GeoQueryDTO, db: AsyncSession = Depends(get_db)) -> List[BuildingDTO]:
+async def search_buildings_by_geo(
+    geo_query: GeoQueryDTO,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Поиск зданий по геолокации.
 
     Варианты поиска:
     - В радиусе от точки: укажите latitude, longitude и radius_km
     - В прямоугольной области: укажите min_lat, max_lat, min_lng, max_lng
+
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
+        fieldset = parse_fields(fields, BUILDING_FIELDS)
         if geo_query.radius_km:
             buildings = await BuildingService.get_buildings_in_radius(
-                db, geo_query.latitude, geo_query.longitude, geo_query.radius_km
+                db, geo_query.latitude, geo_query.longitude, geo_query.radius_km, fieldset
             )
         elif all([geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng]):
             buildings = await BuildingService.get_buildings_in_rectangle(
-                db, geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng
+                db, geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng, fieldset
             )
         else:
             raise HTTPException(
@@ -75,9 +110,11 @@ async def search_buildings_by_geo(geo_query: GeoQueryDTO, db: AsyncSession = Dep
                 detail='Either radius_km or all rectangle coordinates must be provided',
             )
 
-        return [BuildingDTO(**b) for b in buildings]
+        return json_response(response_type(List[BuildingDTO], fieldset), buildings)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error searching buildings by geo: {e}')
         raise HTTPException(
@@ -85,14 +122,100 @@ async def search_buildings_by_geo(geo_query: GeoQueryDTO, db: AsyncSession = Dep
         )
 
 
+@router.post('/geo/search/batch', response_model=List[List[BuildingDTO]], summary='Пакетный поиск зданий по геолокации')
+async def search_buildings_by_geo_batch(
+    geo_queries: List[GeoQueryDTO] = Body(..., max_length=GEO_BATCH_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Пакетный поиск зданий по геолокации: список запросов в формате /geo/search,
+    в ответе по списку результатов на каждый запрос в том же порядке.
+    Весь пакет выполняется одним запросом к базе.
+    """
+    try:
+        for i, geo_query in enumerate(geo_queries):
+            if not geo_query.radius_km and not all(
+                [geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng]
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Query #{i}: either radius_km or all rectangle coordinates must be provided',
+                )
+
+        buildings = await BuildingService.search_buildings_by_geo_batch(db, [q.model_dump() for q in geo_queries])
+        return json_response(List[List[BuildingDTO]], buildings)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f'Error searching buildings by geo batch: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error searching buildings: {str(e)}'
+        )
+
+
+@router.get('/search/by-address', response_model=List[BuildingDTO], summary='Поиск зданий по адресу')
+async def search_buildings_by_address(
+    request: Request,
+    address: str = Query(..., description='Адрес или его часть для поиска'),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    rank: bool = Query(
+        False, description='Сортировать по похожести адреса (pg_trgm); выдача - одна страница из limit записей'
+    ),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Поиск зданий по адресу (регистронезависимый поиск по подстроке).
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
+    """
+    try:
+        fieldset = parse_fields(fields, BUILDING_FIELDS)
+        buildings, next_after_id = await BuildingService.search_buildings_by_address(
+            db, address, limit, rank, after_id, fieldset
+        )
+        return json_response(
+            response_type(List[BuildingDTO], fieldset),
+            buildings,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f'Error searching buildings by address {address}: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error searching buildings: {str(e)}'
+        )
+
+
 @router.get('/', response_model=List[BuildingDTO], summary='Получить все здания')
-async def get_all_buildings(db: AsyncSession = Depends(get_db)) -> List[BuildingDTO]:
+async def get_all_buildings(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Размер страницы'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
-    Получить список всех зданий.
+    Получить список зданий постранично.
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        buildings = await BuildingService.get_all_buildings(db)
-        return [BuildingDTO(**b) for b in buildings]
+        fieldset = parse_fields(fields, BUILDING_FIELDS)
+        buildings, next_after_id = await BuildingService.get_all_buildings(db, limit, after_id, fieldset)
+        return json_response(
+            response_type(List[BuildingDTO], fieldset),
+            buildings,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting all buildings: {e}')
         raise HTTPException(
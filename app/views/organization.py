@@ -1,16 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List, Optional
 import logging
 
 from app.database import get_db
-from app.dto.building import GeoQueryDTO
-from app.dto.organization import OrganizationCreateDTO, OrganizationDTO, OrganizationUpdateDTO
+from app.dto.building import GEO_BATCH_MAX_SIZE, GeoQueryDTO
+from app.dto.organization import (
+    ORGANIZATION_BULK_MAX_SIZE,
+    ORGANIZATION_FIELDS,
+    OrganizationCreateDTO,
+    OrganizationDTO,
+    OrganizationDistanceDTO,
+    OrganizationNameDTO,
+    OrganizationSearchDTO,
+    OrganizationUpdateDTO,
+)
 from app.services.organization import OrganizationService
+from app.utils.fieldsets import parse_fields, response_type
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_headers
+from app.utils.serialization import json_response
+from app.utils.versions import conditional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/organizations', tags=['organizations'])
 
+FIELDS_DESCRIPTION = 'Поля ответа через запятую, например id,name,building.address'
+
+# Организации читаются со зданием и видами деятельности: при совпадении If-None-Match ответ 304 без запросов к базе
+conditional_get = conditional('organization', 'building', 'activity')
+
 
 @router.post(
     '/', response_model=OrganizationDTO, status_code=status.HTTP_201_CREATED, summary='Создать новую организацию'
@@ -36,20 +55,123 @@ async def create_organization(
         )
 
 
+@router.post(
+    '/bulk',
+    response_model=List[OrganizationDTO],
+    status_code=status.HTTP_201_CREATED,
+    summary='Создать организации пакетом',
+)
+async def create_organizations(
+    organizations_data: List[OrganizationCreateDTO] = Body(..., min_length=1, max_length=ORGANIZATION_BULK_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Создать сразу несколько организаций (поля как в POST /organizations/).
+
+    Все организации, их телефоны и виды деятельности записываются в одной транзакции:
+    при ошибке не создаётся ни одна. В ответе созданные организации в том же порядке.
+    """
+    try:
+        organizations = await OrganizationService.create_organizations(
+            db, [organization.model_dump() for organization in organizations_data]
+        )
+        return json_response(List[OrganizationDTO], organizations, status_code=status.HTTP_201_CREATED)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f'Error creating organizations in bulk: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error creating organizations: {str(e)}'
+        )
+
+
+@router.get('/nearest', response_model=List[OrganizationDistanceDTO], summary='Ближайшие организации')
+async def get_nearest_organizations(
+    lat: float = Query(..., ge=-90, le=90, description='Широта точки'),
+    lng: float = Query(..., ge=-180, le=180, description='Долгота точки'),
+    k: int = Query(10, ge=1, le=100, description='Количество организаций'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Получить k ближайших к точке организаций, отсортированных по расстоянию (distance_km).
+
+    Радиус поиска расширяется автоматически, указывать его не нужно.
+    """
+    try:
+        organizations = await OrganizationService.get_nearest_organizations(db, lat, lng, k)
+        return json_response(List[OrganizationDistanceDTO], organizations, headers=etag_headers)
+    except Exception as e:
+        logger.error(f'Error getting nearest organizations to ({lat}, {lng}): {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error getting organizations: {str(e)}'
+        )
+
+
+@router.get('/autocomplete', response_model=List[OrganizationNameDTO], summary='Автодополнение названий организаций')
+async def autocomplete_organizations(
+    q: str = Query(..., min_length=1, description='Начало названия организации'),
+    limit: int = Query(10, ge=1, le=50, description='Максимальное число подсказок'),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Подсказки для строки поиска: ID и названия организаций, начинающиеся с q, по алфавиту.
+    """
+    try:
+        completions = await OrganizationService.autocomplete_organizations(db, q, limit)
+        return json_response(List[OrganizationNameDTO], completions, headers=etag_headers)
+    except Exception as e:
+        logger.error(f'Error autocompleting organizations by prefix {q}: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error autocompleting organizations: {str(e)}'
+        )
+
+
+@router.get('/export.ndjson', summary='Выгрузить все организации в NDJSON')
+async def export_organizations(
+    request: Request, etag_headers: Dict[str, str] = Depends(conditional_get)
+) -> StreamingResponse:
+    """
+    Выгрузить все организации со зданием, телефонами и видами деятельности,
+    по одной организации (JSON в формате OrganizationDTO) на строку.
+
+    Ответ передаётся потоком: записи читаются из базы порциями через серверный курсор.
+    """
+
+    async def stream():
+        # Сессия из get_db закрывается до начала передачи ответа, поэтому поток открывает свою
+        async with request.app.state.db() as db:
+            async for lines in OrganizationService.export_organizations(db):
+                yield lines
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson', headers=etag_headers)
+
+
 @router.get('/{organization_id}', response_model=OrganizationDTO, summary='Получить организацию по ID')
-async def get_organization(organization_id: int, db: AsyncSession = Depends(get_db)) -> OrganizationDTO:
+async def get_organization(
+    organization_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Получить подробную информацию об организации по её идентификатору.
+
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organization = await OrganizationService.get_organization_by_id(db, organization_id)
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organization = await OrganizationService.get_organization_by_id(db, organization_id, fieldset)
         if not organization:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=f'Organization with id {organization_id} not found'
             )
-        return organization
+        return json_response(response_type(OrganizationDTO, fieldset), organization, headers=etag_headers)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting organization {organization_id}: {e}')
         raise HTTPException(
@@ -58,13 +180,23 @@ async def get_organization(organization_id: int, db: AsyncSession = Depends(get_
 
 
 @router.get('/building/{building_id}', response_model=List[OrganizationDTO], summary='Список организаций в здании')
-async def get_organizations_by_building(building_id: int, db: AsyncSession = Depends(get_db)) -> List[OrganizationDTO]:
+async def get_organizations_by_building(
+    building_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Получить список всех организаций, находящихся в конкретном здании.
+
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organizations = await OrganizationService.get_organizations_by_building(db, building_id)
-        return organizations
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations = await OrganizationService.get_organizations_by_building(db, building_id, fieldset)
+        return json_response(response_type(List[OrganizationDTO], fieldset), organizations, headers=etag_headers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting organizations for building {building_id}: {e}')
         raise HTTPException(
@@ -75,14 +207,24 @@ async def get_organizations_by_building(building_id: int, db: AsyncSession = Dep
 @router.get(
     '/activity/{activity_id}', response_model=List[OrganizationDTO], summary='Список организаций по виду деятельности'
 )
-async def get_organizations_by_activity(activity_id: int, db: AsyncSession = Depends(get_db)) -> List[OrganizationDTO]:
+async def get_organizations_by_activity(
+    activity_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Получить список всех организаций, которые относятся к указанному виду деятельности.
     Включает организации с дочерними видами деятельности.
+
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organizations = await OrganizationService.get_organizations_by_activity(db, activity_id)
-        return organizations
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations = await OrganizationService.get_organizations_by_activity(db, activity_id, fieldset)
+        return json_response(response_type(List[OrganizationDTO], fieldset), organizations, headers=etag_headers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting organizations for activity {activity_id}: {e}')
         raise HTTPException(
@@ -92,23 +234,41 @@ async def get_organizations_by_activity(activity_id: int, db: AsyncSession = Dep
 
 @router.post('/geo/search', response_model=List[OrganizationDTO], summary='Поиск организаций по геолокации')
 async def search_organizations_by_geo(
-    geo_query: GeoQueryDTO, db: AsyncSession = Depends(get_db)
-) -> List[OrganizationDTO]:
+    geo_query: GeoQueryDTO,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Размер страницы'),
+    cursor: Optional[str] = Query(None, description='Курсор следующей страницы из заголовка X-Next-Cursor'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Поиск организаций по геолокации.
 
     Варианты поиска:
     - В радиусе от точки: укажите latitude, longitude и radius_km
     - В прямоугольной области: укажите min_lat, max_lat, min_lng, max_lng
+
+    Результаты отсортированы по расстоянию от точки (latitude, longitude).
+    При указании limit курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
         if geo_query.radius_km:
-            organizations = await OrganizationService.get_organizations_in_radius(
-                db, geo_query.latitude, geo_query.longitude, geo_query.radius_km
+            organizations, next_cursor = await OrganizationService.get_organizations_in_radius(
+                db, geo_query.latitude, geo_query.longitude, geo_query.radius_km, limit, cursor, fieldset
             )
         elif all([geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng]):
-            organizations = await OrganizationService.get_organizations_in_rectangle(
-                db, geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng
+            organizations, next_cursor = await OrganizationService.get_organizations_in_rectangle(
+                db,
+                geo_query.min_lat,
+                geo_query.max_lat,
+                geo_query.min_lng,
+                geo_query.max_lng,
+                geo_query.latitude,
+                geo_query.longitude,
+                limit,
+                cursor,
+                fieldset,
             )
         else:
             raise HTTPException(
@@ -116,9 +276,12 @@ async def search_organizations_by_geo(
                 detail='Either radius_km or all rectangle coordinates must be provided',
             )
 
-        return organizations
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+        return json_response(response_type(List[OrganizationDTO], fieldset), organizations, headers=headers)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error searching organizations by geo: {e}')
         raise HTTPException(
@@ -126,16 +289,128 @@ async def search_organizations_by_geo(
         )
 
 
+@router.post(
+    '/geo/search/batch', response_model=List[List[OrganizationDTO]], summary='Пакетный поиск организаций по геолокации'
+)
+async def search_organizations_by_geo_batch(
+    geo_queries: List[GeoQueryDTO] = Body(..., max_length=GEO_BATCH_MAX_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Пакетный поиск организаций по геолокации: список запросов в формате /geo/search,
+    в ответе по списку результатов на каждый запрос в том же порядке.
+    Весь пакет выполняется одним запросом к базе.
+    """
+    try:
+        for i, geo_query in enumerate(geo_queries):
+            if not geo_query.radius_km and not all(
+                [geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng]
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Query #{i}: either radius_km or all rectangle coordinates must be provided',
+                )
+
+        organizations = await OrganizationService.search_organizations_by_geo_batch(
+            db, [q.model_dump() for q in geo_queries]
+        )
+        return json_response(List[List[OrganizationDTO]], organizations)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f'Error searching organizations by geo batch: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error searching organizations: {str(e)}'
+        )
+
+
+@router.post('/search', response_model=List[OrganizationDTO], summary='Поиск организаций по нескольким фильтрам')
+async def search_organizations(
+    request: Request,
+    search_query: OrganizationSearchDTO,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Поиск организаций по любому сочетанию фильтров, все указанные фильтры должны выполняться:
+
+    - **name**: Подстрока названия (без учёта регистра)
+    - **activity_id**: Вид деятельности вместе со всеми вложенными
+    - **building_id**: ID здания
+    - **geo**: Область в формате /geo/search (радиус или прямоугольник)
+
+    Фильтры объединяются в один SQL-запрос; результаты отсортированы по ID.
+    Ссылка на следующую страницу передаётся в заголовке Link (rel="next"), тело запроса повторяется.
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
+    """
+    try:
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        filters = search_query.model_dump(exclude_none=True)
+        if not filters:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='At least one filter must be provided')
+        geo_query = search_query.geo
+        if (
+            geo_query
+            and not geo_query.radius_km
+            and not all([geo_query.min_lat, geo_query.max_lat, geo_query.min_lng, geo_query.max_lng])
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Either radius_km or all rectangle coordinates must be provided',
+            )
+
+        organizations, next_after_id = await OrganizationService.search_organizations(
+            db, filters, limit, after_id, fieldset
+        )
+        return json_response(
+            response_type(List[OrganizationDTO], fieldset),
+            organizations,
+            headers=page_headers(request.url, next_after_id),
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f'Error searching organizations by filters: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error searching organizations: {str(e)}'
+        )
+
+
 @router.get('/search/by-name', response_model=List[OrganizationDTO], summary='Поиск организаций по названию')
 async def search_organizations_by_name(
-    name: str = Query(..., description='Название организации для поиска'), db: AsyncSession = Depends(get_db)
-) -> List[OrganizationDTO]:
+    request: Request,
+    name: str = Query(..., description='Название организации для поиска'),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    rank: bool = Query(
+        False, description='Сортировать по похожести названия (pg_trgm); выдача - одна страница из limit записей'
+    ),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
-    Поиск организации по названию (регистронезависимый поиск).
+    Поиск организации по названию (регистронезависимый поиск по подстроке).
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organizations = await OrganizationService.search_organizations_by_name(db, name)
-        return organizations
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations, next_after_id = await OrganizationService.search_organizations_by_name(
+            db, name, limit, rank, after_id, fieldset
+        )
+        return json_response(
+            response_type(List[OrganizationDTO], fieldset),
+            organizations,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error searching organizations by name {name}: {e}')
         raise HTTPException(
@@ -143,13 +418,57 @@ async def search_organizations_by_name(
         )
 
 
+@router.get('/search/by-phone', response_model=List[OrganizationDTO], summary='Поиск организаций по телефону')
+async def search_organizations_by_phone(
+    request: Request,
+    phone: str = Query(..., description='Номер телефона в любом формате или его окончание'),
+    suffix: bool = Query(False, description='Искать по окончанию номера, а не по номеру целиком'),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Поиск организаций по номеру телефона.
+
+    Сравниваются только цифры номера: "8-923-666-13-13" и "8 (923) 666 1313" совпадают.
+    С suffix=true номер ищется по окончанию, например "6661313".
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
+    """
+    try:
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations, next_after_id = await OrganizationService.search_organizations_by_phone(
+            db, phone, suffix, limit, after_id, fieldset
+        )
+        return json_response(
+            response_type(List[OrganizationDTO], fieldset),
+            organizations,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f'Error searching organizations by phone {phone}: {e}')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Error searching organizations: {str(e)}'
+        )
+
+
 @router.get(
     '/search/by-activity-tree', response_model=List[OrganizationDTO], summary='Поиск организаций по дереву деятельности'
 )
 async def search_organizations_by_activity_tree(
+    request: Request,
     activity_name: str = Query(..., description='Название вида деятельности для поиска'),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description='Максимальное число результатов'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
     db: AsyncSession = Depends(get_db),
-) -> List[OrganizationDTO]:
+) -> Response:
     """
     Поиск организаций по дереву деятельности.
 
@@ -157,11 +476,23 @@ async def search_organizations_by_activity_tree(
     - Еда (корневой уровень)
     - Мясная продукция (дочерний уровень)
     - Молочная продукция (дочерний уровень)
-    и т.д. (до 3 уровней вложенности)
+    и т.д. (на любую глубину вложенности)
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organizations = await OrganizationService.search_organizations_by_activity_tree(db, activity_name)
-        return organizations
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations, next_after_id = await OrganizationService.search_organizations_by_activity_tree(
+            db, activity_name, limit, after_id, fieldset
+        )
+        return json_response(
+            response_type(List[OrganizationDTO], fieldset),
+            organizations,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error searching organizations by activity tree {activity_name}: {e}')
         raise HTTPException(
@@ -170,13 +501,30 @@ async def search_organizations_by_activity_tree(
 
 
 @router.get('/', response_model=List[OrganizationDTO], summary='Получить все организации')
-async def get_all_organizations(db: AsyncSession = Depends(get_db)) -> List[OrganizationDTO]:
+async def get_all_organizations(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Размер страницы'),
+    after_id: Optional[int] = Query(None, description='ID последней записи предыдущей страницы'),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    etag_headers: Dict[str, str] = Depends(conditional_get),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
-    Получить список всех организаций.
+    Получить список организаций постранично.
+
+    Страницы идут по возрастанию ID; ссылка на следующую страницу передаётся в заголовке Link (rel="next").
+    В fields можно перечислить нужные поля, тогда в ответе и в запросе к базе будут только они.
     """
     try:
-        organizations = await OrganizationService.get_all_organizations(db)
-        return organizations
+        fieldset = parse_fields(fields, ORGANIZATION_FIELDS)
+        organizations, next_after_id = await OrganizationService.get_all_organizations(db, limit, after_id, fieldset)
+        return json_response(
+            response_type(List[OrganizationDTO], fieldset),
+            organizations,
+            headers={**etag_headers, **page_headers(request.url, next_after_id)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f'Error getting all organizations: {e}')
         raise HTTPException(
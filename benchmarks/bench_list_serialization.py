@@ -0,0 +1,105 @@
+"""
+Стоимость сериализации списков в ответе: прежний путь через dict и response_model против json_response.
+
+Прежний путь повторяет то, что делали сервис, обработчик и FastAPI: DTO -> dict -> DTO,
+затем model_dump, проверка по response_model, приведение к JSON-типам и json.dumps.
+Новый путь: одна проверка ORM-объекта в DTO и TypeAdapter.dump_json.
+
+Запуск: python benchmarks/bench_list_serialization.py [кол-во записей ...]
+"""
+
+import json
+import os
+import sys
+import timeit
+from functools import partial
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+from app.dto.building import BuildingDTO
+from app.dto.organization import OrganizationDTO
+from app.utils.serialization import json_response
+
+
+def make_buildings(count: int):
+    return [
+        SimpleNamespace(id=i, address=f'г. Москва, ул. Ленина {i}', latitude=55.75 + i * 1e-5, longitude=37.61)
+        for i in range(count)
+    ]
+
+
+def make_organizations(count: int):
+    buildings = make_buildings(10)
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f'ООО "Рога и Копыта {i}"',
+            building_id=buildings[i % 10].id,
+            building=buildings[i % 10],
+            phones=[SimpleNamespace(id=i * 2 + j, phone_number=f'8-923-666-13-{j:02}') for j in range(2)],
+            activities=[SimpleNamespace(id=j, name=f'Вид {j}', parent_id=None) for j in range(3)],
+        )
+        for i in range(count)
+    ]
+
+
+def fastapi_response_model(adapter: TypeAdapter, content) -> bytes:
+    """Обработка возвращённого из обработчика значения в FastAPI: model_dump, проверка, JSON-типы, json.dumps"""
+    value = adapter.validate_python([item.model_dump() for item in content])
+    return json.dumps(adapter.dump_python(value, mode='json'), ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def buildings_before(rows, adapter: TypeAdapter) -> bytes:
+    dicts = [BuildingDTO.model_validate(b).model_dump() for b in rows]
+    return fastapi_response_model(adapter, [BuildingDTO(**b) for b in dicts])
+
+
+def organizations_before(rows, adapter: TypeAdapter) -> bytes:
+    return fastapi_response_model(adapter, [OrganizationDTO.model_validate(org) for org in rows])
+
+
+def buildings_after(rows) -> bytes:
+    return json_response(List[BuildingDTO], [BuildingDTO.model_validate(b) for b in rows]).body
+
+
+def organizations_after(rows) -> bytes:
+    return json_response(List[OrganizationDTO], [OrganizationDTO.model_validate(org) for org in rows]).body
+
+
+def per_item_us(func, size: int) -> float:
+    number = max(1, 20_000 // size)
+    return min(timeit.repeat(func, number=number, repeat=5)) / number / size * 1_000_000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1_000, 10_000]
+    building_adapter = TypeAdapter(List[BuildingDTO])
+    organization_adapter = TypeAdapter(List[OrganizationDTO])
+
+    print(f'{"list":>14} {"rows":>8} {"before, us/item":>16} {"after, us/item":>15} {"speedup":>8}')
+    for size in sizes:
+        buildings, organizations = make_buildings(size), make_organizations(size)
+        cases = [
+            (
+                'buildings',
+                partial(buildings_before, buildings, building_adapter),
+                partial(buildings_after, buildings),
+            ),
+            (
+                'organizations',
+                partial(organizations_before, organizations, organization_adapter),
+                partial(organizations_after, organizations),
+            ),
+        ]
+        for name, before, after in cases:
+            assert json.loads(before()) == json.loads(after())
+            before_us, after_us = per_item_us(before, size), per_item_us(after, size)
+            print(f'{name:>14} {size:>8} {before_us:>16.2f} {after_us:>15.2f} {before_us / after_us:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Сравнение фильтрации кандидатов по радиусу: цикл haversine по строкам против NumPy.
+
+Запуск: python benchmarks/bench_radius_filter.py [кол-во кандидатов ...]
+"""
+
+import os
+import random
+import sys
+import timeit
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.utils.geo import haversine_km, haversine_km_many, radius_bboxes
+
+LAT, LNG, RADIUS_KM = 55.7558, 37.6173, 5.0
+
+
+def make_rows(count: int):
+    ((min_lat, max_lat, min_lng, max_lng),) = radius_bboxes(LAT, LNG, RADIUS_KM)
+    return [(i, random.uniform(min_lat, max_lat), random.uniform(min_lng, max_lng)) for i in range(count)]
+
+
+def loop_filter(rows):
+    return [building_id for building_id, lat, lng in rows if haversine_km(LAT, LNG, lat, lng) <= RADIUS_KM]
+
+
+def numpy_filter(rows):
+    ids, lats, lngs = (np.array(column) for column in zip(*rows))
+    return ids[haversine_km_many(LAT, LNG, lats, lngs) <= RADIUS_KM].tolist()
+
+
+def main():
+    random.seed(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(f'{"rows":>8} {"loop, ms":>10} {"numpy, ms":>10} {"speedup":>8}')
+    for size in sizes:
+        rows = make_rows(size)
+        assert loop_filter(rows) == numpy_filter(rows)
+        number = max(1, 100_000 // size)
+        loop_ms = min(timeit.repeat(partial(loop_filter, rows), number=number, repeat=5)) / number * 1000
+        numpy_ms = min(timeit.repeat(partial(numpy_filter, rows), number=number, repeat=5)) / number * 1000
+        print(f'{size:>8} {loop_ms:>10.2f} {numpy_ms:>10.2f} {loop_ms / numpy_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ from app.models.base_model import Base
 from app.models.activity import Activity  # noqa: F401
 from app.models.organization import Organization, OrganizationPhone  # noqa: F401
 from app.models.building import Building  # noqa: F401
+from app.models.table_version import TableVersion  # noqa: F401
+from app.utils.geo import encode_cell
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -82,19 +84,49 @@ async def populate_test_data():
             """
             await session.execute(text(activities_sql))
 
+            # Заполняем таблицу замыкания дерева видов деятельности
+            logger.info('Building activity closure...')
+            activity_closure_sql = """
+            INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM activity
+                UNION ALL
+                SELECT tree.ancestor_id, activity.id, tree.depth + 1
+                FROM tree JOIN activity ON activity.parent_id = tree.descendant_id
+            )
+            SELECT ancestor_id, descendant_id, depth FROM tree
+            ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+            """
+            await session.execute(text(activity_closure_sql))
+
             # Вставляем здания
             logger.info('Inserting buildings...')
+            buildings = [
+                (1, 'г. Москва, ул. Ленина 1, офис 3', 55.7558, 37.6173),
+                (2, 'г. Москва, ул. Тверская 15', 55.7600, 37.6000),
+                (3, 'г. Санкт-Петербург, Невский проспект 25', 59.9343, 30.3351),
+                (4, 'г. Казань, ул. Баумана 10', 55.7964, 49.1088),
+                (5, 'г. Екатеринбург, ул. Мамина-Сибиряка 45', 56.8389, 60.6057),
+                (6, 'г. Новосибирск, Красный проспект 50', 55.0084, 82.9357),
+            ]
             buildings_sql = """
-            INSERT INTO building (id, address, latitude, longitude) VALUES
-            (1, 'г. Москва, ул. Ленина 1, офис 3', 55.7558, 37.6173),
-            (2, 'г. Москва, ул. Тверская 15', 55.7600, 37.6000),
-            (3, 'г. Санкт-Петербург, Невский проспект 25', 59.9343, 30.3351),
-            (4, 'г. Казань, ул. Баумана 10', 55.7964, 49.1088),
-            (5, 'г. Екатеринбург, ул. Мамина-Сибиряка 45', 56.8389, 60.6057),
-            (6, 'г. Новосибирск, Красный проспект 50', 55.0084, 82.9357)
+            INSERT INTO building (id, address, latitude, longitude, geo_cell)
+            VALUES (:id, :address, :latitude, :longitude, :geo_cell)
             ON CONFLICT (id) DO NOTHING;
             """
-            await session.execute(text(buildings_sql))
+            await session.execute(
+                text(buildings_sql),
+                [
+                    {
+                        'id': building_id,
+                        'address': address,
+                        'latitude': lat,
+                        'longitude': lng,
+                        'geo_cell': encode_cell(lat, lng),
+                    }
+                    for building_id, address, lat, lng in buildings
+                ],
+            )
 
             # Вставляем организации
             logger.info('Inserting organizations...')
@@ -117,45 +149,51 @@ async def populate_test_data():
             # Вставляем телефоны организаций
             logger.info('Inserting phone numbers...')
             phones_sql = """
-            INSERT INTO organizationphone (id, organization_id, phone_number) VALUES
-            -- ООО "Рога и Копыта"
-            (1, 1, '8-800-555-35-35'),
-            (2, 1, '8-495-123-45-67'),
-            (3, 1, '8-926-111-22-33'),
-
-            -- ИП "Мясной двор"
-            (4, 2, '8-800-200-10-10'),
-            (5, 2, '8-495-222-33-44'),
-
-            -- АО "Молоко Сибири"
-            (6, 3, '8-383-123-45-67'),
-            (7, 3, '8-913-456-78-90'),
-
-            -- ООО "АвтоМир"
-            (8, 4, '8-843-111-22-33'),
-            (9, 4, '8-927-333-44-55'),
-
-            -- ЗАО "ТехноСити"
-            (10, 5, '8-343-222-33-44'),
-            (11, 5, '8-912-777-88-99'),
-
-            -- ИП "Модная одежда"
-            (12, 6, '8-383-444-55-66'),
-
-            -- ООО "Пивной бар"
-            (13, 7, '8-800-777-88-99'),
-            (14, 7, '8-495-555-66-77'),
-
-            -- АО "Автозапчасти"
-            (15, 8, '8-800-888-99-00'),
-            (16, 8, '8-495-666-77-88'),
-
-            -- ИП "Фруктовый рай"
-            (17, 9, '8-913-999-00-11'),
-
-            -- ООО "Электроника+"
-            (18, 10, '8-800-123-45-67'),
-            (19, 10, '8-927-222-33-44')
+            INSERT INTO organizationphone (id, organization_id, phone_number, phone_digits, phone_digits_reversed)
+            SELECT id, organization_id, phone_number, digits, reverse(digits)
+            FROM (
+                SELECT id, organization_id, phone_number, regexp_replace(phone_number, '[^0-9]', '', 'g') AS digits
+                FROM (VALUES
+                    -- ООО "Рога и Копыта"
+                    (1, 1, '8-800-555-35-35'),
+                    (2, 1, '8-495-123-45-67'),
+                    (3, 1, '8-926-111-22-33'),
+
+                    -- ИП "Мясной двор"
+                    (4, 2, '8-800-200-10-10'),
+                    (5, 2, '8-495-222-33-44'),
+
+                    -- АО "Молоко Сибири"
+                    (6, 3, '8-383-123-45-67'),
+                    (7, 3, '8-913-456-78-90'),
+
+                    -- ООО "АвтоМир"
+                    (8, 4, '8-843-111-22-33'),
+                    (9, 4, '8-927-333-44-55'),
+
+                    -- ЗАО "ТехноСити"
+                    (10, 5, '8-343-222-33-44'),
+                    (11, 5, '8-912-777-88-99'),
+
+                    -- ИП "Модная одежда"
+                    (12, 6, '8-383-444-55-66'),
+
+                    -- ООО "Пивной бар"
+                    (13, 7, '8-800-777-88-99'),
+                    (14, 7, '8-495-555-66-77'),
+
+                    -- АО "Автозапчасти"
+                    (15, 8, '8-800-888-99-00'),
+                    (16, 8, '8-495-666-77-88'),
+
+                    -- ИП "Фруктовый рай"
+                    (17, 9, '8-913-999-00-11'),
+
+                    -- ООО "Электроника+"
+                    (18, 10, '8-800-123-45-67'),
+                    (19, 10, '8-927-222-33-44')
+                ) AS phones (id, organization_id, phone_number)
+            ) AS normalized
             ON CONFLICT (id) DO NOTHING;
             """
             await session.execute(text(phones_sql))
@@ -4,7 +4,11 @@ from fastapi import FastAPI
 
 from app.database import async_engine, async_session
 from app.models.base_model import Base
-from settings import APP_CONFIG
+from app.utils.activity_tree import activity_tree
+from app.utils.building_index import building_index
+from app.utils.name_index import organization_name_index
+from app.utils.name_trie import activity_trie, organization_trie
+from settings import APP_CONFIG, BUILDING_SPATIAL_INDEX, ORGANIZATION_NAME_INDEX
 from app.routers import api_router
 
 
@@ -13,6 +17,14 @@ async def lifespan(main_app: FastAPI):
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     main_app.state.db = async_session
+    async with async_session() as db:
+        await activity_tree.load(db)
+        await activity_trie.load(db)
+        await organization_trie.load(db)
+        if BUILDING_SPATIAL_INDEX:
+            await building_index.load(db)
+        if ORGANIZATION_NAME_INDEX:
+            await organization_name_index.load(db)
     yield
 
 
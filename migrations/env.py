@@ -31,6 +31,7 @@ from app.models import base_model
 from app.models.organization import Organization, OrganizationPhone
 from app.models.activity import Activity
 from app.models.building import Building
+from app.models.table_version import TableVersion
 
 target_metadata = base_model.Base.metadata
 
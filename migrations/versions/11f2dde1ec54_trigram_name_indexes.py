@@ -0,0 +1,52 @@
+"""trigram name indexes
+
+Revision ID: 11f2dde1ec54
+Revises: ae7934e9fad5
+Create Date: 2026-10-17 12:41:09.127530
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '11f2dde1ec54'
+down_revision: Union[str, None] = 'ae7934e9fad5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_organization_name_trgm',
+        'organization',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_activity_name_trgm',
+        'activity',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_building_address_trgm',
+        'building',
+        ['address'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'address': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_building_address_trgm', table_name='building')
+    op.drop_index('ix_activity_name_trgm', table_name='activity')
+    op.drop_index('ix_organization_name_trgm', table_name='organization')
@@ -0,0 +1,64 @@
+"""table version
+
+Revision ID: 1f02962b97b1
+Revises: 65365ef601ca
+Create Date: 2026-10-17 18:05:12.604113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f02962b97b1'
+down_revision: Union[str, None] = '65365ef601ca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Список таблиц на момент этой ревизии (app/models/table_version.py: VERSIONED_TABLES) - копия, а не импорт,
+# чтобы ревизия не менялась вместе с приложением. Новой версионируемой таблице нужна новая миграция.
+VERSIONED_TABLES = {
+    'activity': 'activity',
+    'activity_closure': 'activity',
+    'building': 'building',
+    'organization': 'organization',
+    'organizationphone': 'organization',
+    'organization_activity': 'organization',
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tableversion',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    # Строка версии блокируется каждым пишущим оператором до commit: конкурентные записи в таблицы
+    # одной версии идут по очереди (см. BUMP_VERSION_FUNCTION в app/models/table_version.py)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO tableversion (table_name, version) VALUES (TG_ARGV[0], txid_current())
+            ON CONFLICT (table_name) DO UPDATE SET version = EXCLUDED.version;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, version in VERSIONED_TABLES.items():
+        op.execute(
+            f'CREATE OR REPLACE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('{version}')"
+        )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+    op.drop_table('tableversion')
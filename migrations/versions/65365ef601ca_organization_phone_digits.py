@@ -0,0 +1,47 @@
+"""organization phone digits
+
+Revision ID: 65365ef601ca
+Revises: 11f2dde1ec54
+Create Date: 2026-10-17 13:20:44.318905
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '65365ef601ca'
+down_revision: Union[str, None] = '11f2dde1ec54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('organizationphone', sa.Column('phone_digits', sa.String(length=50), nullable=True))
+    op.add_column('organizationphone', sa.Column('phone_digits_reversed', sa.String(length=50), nullable=True))
+
+    op.execute(
+        "UPDATE organizationphone SET phone_digits = regexp_replace(phone_number, '[^0-9]', '', 'g'), "
+        "phone_digits_reversed = reverse(regexp_replace(phone_number, '[^0-9]', '', 'g'))"
+    )
+
+    op.alter_column('organizationphone', 'phone_digits', nullable=False)
+    op.alter_column('organizationphone', 'phone_digits_reversed', nullable=False)
+    op.create_index(op.f('ix_organizationphone_phone_digits'), 'organizationphone', ['phone_digits'], unique=False)
+    op.create_index(
+        'ix_organizationphone_phone_digits_reversed',
+        'organizationphone',
+        ['phone_digits_reversed'],
+        unique=False,
+        postgresql_ops={'phone_digits_reversed': 'text_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_organizationphone_phone_digits_reversed', table_name='organizationphone')
+    op.drop_index(op.f('ix_organizationphone_phone_digits'), table_name='organizationphone')
+    op.drop_column('organizationphone', 'phone_digits_reversed')
+    op.drop_column('organizationphone', 'phone_digits')
@@ -0,0 +1,61 @@
+"""building geo cell
+
+Revision ID: ae7934e9fad5
+Revises: f96fb39e2b57
+Create Date: 2026-10-17 11:02:15.604217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae7934e9fad5'
+down_revision: Union[str, None] = 'f96fb39e2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Кодирование ячейки на момент этой ревизии (app/utils/geo.py: encode_cell). Копия, а не импорт:
+# изменения приложения не должны менять уже применённую миграцию. Если кодирование изменится,
+# geo_cell пересчитывает новая миграция.
+CELL_BITS = 26
+CELL_MAX = (1 << CELL_BITS) - 1
+
+
+def _spread(value: int) -> int:
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def encode_cell(lat: float, lng: float) -> int:
+    lat_index = min(max(int((lat + 90.0) / 180.0 * (1 << CELL_BITS)), 0), CELL_MAX)
+    lng_index = min(max(int((lng + 180.0) / 360.0 * (1 << CELL_BITS)), 0), CELL_MAX)
+    return (_spread(lng_index) << 1) | _spread(lat_index)
+
+
+def upgrade() -> None:
+    op.add_column('building', sa.Column('geo_cell', sa.BigInteger(), nullable=True))
+
+    connection = op.get_bind()
+    buildings = connection.execute(sa.text('SELECT id, latitude, longitude FROM building')).all()
+    if buildings:
+        connection.execute(
+            sa.text('UPDATE building SET geo_cell = :geo_cell WHERE id = :id'),
+            [{'id': b.id, 'geo_cell': encode_cell(b.latitude, b.longitude)} for b in buildings],
+        )
+
+    op.alter_column('building', 'geo_cell', nullable=False)
+    op.create_index(op.f('ix_building_geo_cell'), 'building', ['geo_cell'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_building_geo_cell'), table_name='building')
+    op.drop_column('building', 'geo_cell')
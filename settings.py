@@ -14,5 +14,12 @@ SQLALCHEMY_DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{
 DEBUG = os.getenv('DEBUG', True) == 'True'
 APP_TITLE = os.getenv('APP_TITLE', 'fastapi-app')
 APP_CONFIG = {'title': APP_TITLE, 'debug': DEBUG}
+
+# KD-дерево зданий в памяти процесса для геопоиска (app/utils/building_index.py)
+BUILDING_SPATIAL_INDEX = os.getenv('BUILDING_SPATIAL_INDEX', 'False') == 'True'
+# Инвертированный индекс триграмм названий организаций для поиска по названию (app/utils/name_index.py)
+ORGANIZATION_NAME_INDEX = os.getenv('ORGANIZATION_NAME_INDEX', 'False') == 'True'
+# Сборка JSON списков организаций (по зданию, виду деятельности, геопоиск) в PostgreSQL через json_build_object/json_agg
+ORGANIZATION_JSON_AGG = os.getenv('ORGANIZATION_JSON_AGG', 'False') == 'True'
 if not DEBUG:
     APP_CONFIG['openapi_url'] = None